@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmark of the per-object cost of constructing view DDL.
+
+Compares the constructors of ``CreateView`` and ``DropView`` with the
+previous approach of calling the ``_CreateDropBase`` constructor until it
+stops raising ``TypeError``. Run with::
+
+    PYTHONPATH=. python benchmarks/construct.py
+"""
+
+from __future__ import print_function
+
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy.sql.ddl import _CreateDropBase
+
+from sqlalchemy_views import CreateView, DropView
+
+
+class TryExceptDropView(_CreateDropBase):
+    """DropView as constructed before the constructor was picked on import."""
+
+    def __init__(self, element, on=None, bind=None,
+                 cascade=False, if_exists=False):
+        try:
+            super(TryExceptDropView, self).__init__(element, on=on, bind=bind)
+        except TypeError:
+            if on is not None:
+                raise TypeError("'on' is not supported on SQLAlchemy 1.4+")
+            try:
+                super(TryExceptDropView, self).__init__(element, bind=bind)
+            except TypeError:
+                if bind is not None:
+                    raise TypeError(
+                        "'bind' is not supported on SQLAlchemy 2.0+")
+                super(TryExceptDropView, self).__init__(element)
+        self.cascade = cascade
+        self.if_exists = if_exists
+
+
+def main(number=100000, repeat=5):
+    view = sa.Table('myview', sa.MetaData())
+    selectable = sa.text('SELECT 1')
+    cases = [
+        ('DropView', lambda: DropView(view)),
+        ('DropView (try/except)', lambda: TryExceptDropView(view)),
+        ('CreateView', lambda: CreateView(view, selectable)),
+    ]
+    print('SQLAlchemy %s, best of %d x %d' % (sa.__version__, repeat, number))
+    for name, case in cases:
+        best = min(timeit.repeat(case, number=number, repeat=repeat))
+        print('%-24s %8.3f us per object' % (name, best / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Memory benchmark of compiling a ``CreateView`` with a large selectable.
+
+Measures the peak memory allocated by the current ``visit_create_view``
+and by the previous implementation, which appended each clause to a
+string, on a view over a long inline ``IN`` list. The selectable is
+compiled either by the visit itself or in advance, which isolates the
+assembly of the statement. Compiling in the visit dominates the peak, which
+is the same for both implementations; only precompiled selectables avoid a
+copy. Run with::
+
+    PYTHONPATH=. python benchmarks/memory.py
+"""
+
+from __future__ import print_function
+
+import tracemalloc
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_views import CreateView
+from sqlalchemy_views.views import visit_create_view
+
+
+def concatenating_visit_create_view(create, compiler, **kw):
+    """visit_create_view as it was before the statement was assembled by
+    joining its parts."""
+    view = create.element
+    preparer = compiler.preparer
+    text = "\nCREATE "
+    if create.or_replace:
+        text += "OR REPLACE "
+    text += "VIEW %s " % preparer.format_table(view)
+    if create.columns:
+        column_names = [preparer.format_column(col.element)
+                        for col in create.columns]
+        text += "("
+        text += ', '.join(column_names)
+        text += ") "
+    selectable = create.selectable
+    compiled_selectable = (
+        selectable
+        if isinstance(selectable, sa.engine.Compiled)
+        else compiler.sql_compiler.process(selectable, literal_binds=True)
+    )
+    text += "AS %s" % compiled_selectable
+    text += "\n\n"
+    return text
+
+
+def _peak(function, *args):
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(values=200000):
+    dialect = postgresql.dialect()
+    table = sa.Table('t', sa.MetaData(), sa.Column('id', sa.Integer()))
+    view = sa.Table('myview', sa.MetaData(), sa.Column('id', sa.Integer()))
+    selectable = sa.select(table.c.id).where(table.c.id.in_(range(values)))
+    precompiled = selectable.compile(
+        dialect=dialect, compile_kwargs={'literal_binds': True})
+
+    print('SQLAlchemy %s, %d values, %.1f MB of DDL' % (
+        sa.__version__, values, len(precompiled.string) / 1e6))
+    for label, source in [('compiled in visit', selectable),
+                          ('precompiled', precompiled)]:
+        create_view = CreateView(view, source, size_warning_threshold=None)
+        for name, visit in [('joined', visit_create_view),
+                            ('concatenated', concatenating_visit_create_view)]:
+            compiler = dialect.ddl_compiler(dialect, None)
+            peak = _peak(visit, create_view, compiler)
+            print('%-18s %-13s %8.1f MB peak' % (label, name, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
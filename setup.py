@@ -258,6 +258,14 @@ setup_dict = dict(
     install_requires=[
         'sqlalchemy>=1.0.0',
     ] + python_version_specific_requires,
+    extras_require={
+        'alembic': ['alembic>=1.0'],
+    },
+    entry_points={
+        'console_scripts': [
+            'sqlalchemy-views = sqlalchemy_views.cli:main',
+        ],
+    },
     # Allow tests to be run with `python setup.py test'.
     tests_require=[
         'pytest==2.5.1',
@@ -2,7 +2,9 @@
 """Adds CreateView and related functionality to SQLAlchemy"""
 
 from sqlalchemy_views import metadata
-from sqlalchemy_views.views import CreateView, DropView  # noqa
+from sqlalchemy_views.views import (  # noqa
+    CreateView, DropView, DropViews, LargeViewDefinitionWarning,
+    RefreshMaterializedView)
 
 __version__ = metadata.version
 __author__ = metadata.authors[0]
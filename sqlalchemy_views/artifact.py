@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""A compact file format for shipping precompiled view DDL.
+
+An artifact holds compiled statements for any number of dialects. Each
+distinct string is stored once, so views that compile identically for
+several dialects or tenants share their text, and statements can be zlib
+compressed. Every dialect has a binary index sorted by view name, and
+:class:`ViewArtifact` reads the file through ``mmap``, so looking up a view
+only touches its index entries and its own statement.
+
+Layout (little endian, offsets from the start of the file)::
+
+    header     magic "SQVA", version (H), flags (H), dialect count (I)
+    directory  per dialect: name offset (Q), name length (I),
+               index offset (Q), entry count (I)
+    index      per view, sorted by name: name offset (Q), name length (I),
+               statement offset (Q), statement length (I)
+    strings    the deduplicated UTF-8 strings
+"""
+
+import mmap
+import struct
+import zlib
+
+from sqlalchemy_views.parallel import compile_views
+
+MAGIC = b'SQVA'
+VERSION = 1
+FLAG_COMPRESSED = 1
+
+_HEADER = struct.Struct('<4sHHI')
+_DIRECTORY_ENTRY = struct.Struct('<QIQI')
+_INDEX_ENTRY = struct.Struct('<QIQI')
+
+
+class _StringTable(object):
+
+    def __init__(self, offset):
+        self.offset = offset
+        self.chunks = []
+        self.positions = {}
+
+    def add(self, data):
+        try:
+            return self.positions[data]
+        except KeyError:
+            position = (self.offset, len(data))
+            self.positions[data] = position
+            self.chunks.append(data)
+            self.offset += len(data)
+            return position
+
+
+def write_artifact(fileobj, statements, compress=True):
+    """
+    Writes compiled statements to an artifact.
+
+    Parameters
+    ----------
+    fileobj: file
+        A file opened for writing in binary mode.
+    statements: dict
+        Maps each dialect name to a dict of view names to compiled
+        statements.
+    compress: boolean
+        If True, statements are zlib compressed. View and dialect names
+        are always stored uncompressed.
+    """
+    dialects = sorted(statements)
+    directory_size = _DIRECTORY_ENTRY.size * len(dialects)
+    index_size = _INDEX_ENTRY.size * sum(
+        len(statements[d]) for d in dialects)
+    strings = _StringTable(_HEADER.size + directory_size + index_size)
+
+    directory = []
+    index = []
+    index_offset = _HEADER.size + directory_size
+    for dialect in dialects:
+        views = statements[dialect]
+        names = sorted((name.encode('utf-8'), name) for name in views)
+        name_off, name_len = strings.add(dialect.encode('utf-8'))
+        directory.append(_DIRECTORY_ENTRY.pack(
+            name_off, name_len, index_offset, len(names)))
+        index_offset += _INDEX_ENTRY.size * len(names)
+        for encoded, name in names:
+            data = views[name].encode('utf-8')
+            if compress:
+                data = zlib.compress(data, 9)
+            index.append(_INDEX_ENTRY.pack(
+                *(strings.add(encoded) + strings.add(data))))
+
+    flags = FLAG_COMPRESSED if compress else 0
+    fileobj.write(_HEADER.pack(MAGIC, VERSION, flags, len(dialects)))
+    fileobj.write(b''.join(directory))
+    fileobj.write(b''.join(index))
+    fileobj.write(b''.join(strings.chunks))
+
+
+def compile_artifact(fileobj, elements, dialects, compress=True, **kwargs):
+    """
+    Compiles view DDL for several dialects and writes it to an artifact.
+
+    Statements are keyed by the full name of the view they act on, so
+    ``elements`` should hold at most one statement per view. Extra keyword
+    arguments are passed to :func:`~sqlalchemy_views.parallel.compile_views`.
+
+    Raises
+    ------
+    ValueError
+        If a statement does not act on a single view, e.g. ``DropViews``, or
+        two statements act on the same view.
+    """
+    elements = list(elements)
+    for element in elements:
+        if not hasattr(getattr(element, 'element', None), 'fullname'):
+            raise ValueError(
+                "Artifacts hold statements on a single view, not %s"
+                % type(element).__name__)
+    names = [element.element.fullname for element in elements]
+    if len(set(names)) != len(names):
+        raise ValueError("Artifacts hold one statement per view")
+    statements = {}
+    for dialect in dialects:
+        compiled = compile_views(elements, dialect=dialect, **kwargs)
+        statements[dialect] = dict(zip(names, compiled))
+    write_artifact(fileobj, statements, compress=compress)
+
+
+class ViewArtifact(object):
+    """
+    Reads statements from an artifact file without loading all of it.
+
+    Parameters
+    ----------
+    path: str
+        The artifact file.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("%s is not a view artifact" % path)
+        self.compressed = bool(flags & FLAG_COMPRESSED)
+        self._dialects = {}
+        for i in range(count):
+            name_off, name_len, index_off, entries = \
+                _DIRECTORY_ENTRY.unpack_from(
+                    self._map, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+            name = self._string(name_off, name_len)
+            self._dialects[name] = (index_off, entries)
+
+    @property
+    def dialects(self):
+        return sorted(self._dialects)
+
+    def _string(self, offset, length):
+        return self._map[offset:offset + length].decode('utf-8')
+
+    def _entries(self, dialect):
+        try:
+            return self._dialects[dialect]
+        except KeyError:
+            raise KeyError("No statements for dialect %s" % dialect)
+
+    def _entry(self, index_off, i):
+        return _INDEX_ENTRY.unpack_from(
+            self._map, index_off + i * _INDEX_ENTRY.size)
+
+    def names(self, dialect):
+        """Returns the names of the views compiled for ``dialect``."""
+        index_off, count = self._entries(dialect)
+        return [self._string(*self._entry(index_off, i)[:2])
+                for i in range(count)]
+
+    def get(self, dialect, name):
+        """
+        Returns the statement for view ``name``, found by binary search in
+        the index of ``dialect``.
+        """
+        index_off, count = self._entries(dialect)
+        key = name.encode('utf-8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            name_off, name_len, stmt_off, stmt_len = self._entry(
+                index_off, middle)
+            found = self._map[name_off:name_off + name_len]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                data = self._map[stmt_off:stmt_off + stmt_len]
+                if self.compressed:
+                    data = zlib.decompress(data)
+                return data.decode('utf-8')
+        raise KeyError("No statement for view %s in %s" % (name, dialect))
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Operations on many views at once."""
+
+from sqlalchemy import inspect
+
+from sqlalchemy_views.views import DropView, DropViews, _check_drop_views
+
+# Dialects whose DROP VIEW accepts a list of views.
+MULTI_TARGET_DIALECTS = frozenset(['postgresql', 'mysql', 'mariadb', 'mssql'])
+
+
+def _existing_views(connection, elements, materialized):
+    inspector = inspect(connection)
+    existing = set()
+    for schema in set(element.schema for element in elements):
+        if materialized:
+            names = inspector.get_materialized_view_names(schema=schema)
+        else:
+            names = inspector.get_view_names(schema=schema)
+        existing.update((schema, name) for name in names)
+    return [element for element in elements
+            if (element.schema, element.name) in existing]
+
+
+def drop_views(connection, elements, cascade=False, if_exists=False,
+               materialized=False):
+    """
+    Drops several views with as few statements as the database allows.
+
+    On databases whose DROP VIEW accepts several views, a single
+    :class:`~sqlalchemy_views.DropViews` statement is executed. Elsewhere
+    each view is dropped with its own statement; with ``if_exists=True``
+    the views that exist are looked up first with one catalog query per
+    schema, so missing views cost no round trip.
+
+    Parameters
+    ----------
+    connection: sqlalchemy.engine.Connection
+        The connection to execute the statements on.
+    elements: iterable of sqlalchemy.Table
+        The views to drop.
+    cascade: boolean
+        Also drop any dependent views.
+    if_exists: boolean
+        Do nothing for views that do not exist.
+    materialized: boolean
+        If True, materialized views are dropped.
+
+    Returns
+    -------
+    list
+        The statements that were executed.
+
+    Raises
+    ------
+    ValueError
+        If the database does not support ``cascade`` or ``materialized``,
+        before anything is executed.
+    """
+    elements = list(elements)
+    if not elements:
+        return []
+    if connection.dialect.name in MULTI_TARGET_DIALECTS:
+        statements = [DropViews(elements, cascade=cascade,
+                                if_exists=if_exists,
+                                materialized=materialized)]
+        _check_drop_views(statements[0], connection.dialect.name)
+    else:
+        if if_exists:
+            elements = _existing_views(connection, elements, materialized)
+        statements = [DropView(element, cascade=cascade,
+                               materialized=materialized)
+                      for element in elements]
+    for statement in statements:
+        connection.execute(statement)
+    return statements
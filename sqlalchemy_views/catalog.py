@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""Read view definitions from the database catalog."""
+
+import re
+
+from sqlalchemy import inspect, text
+
+from sqlalchemy_views.views import _compile_selectable
+
+_CATALOG_QUERIES = {
+    'postgresql': text(
+        "SELECT schemaname, viewname, definition FROM pg_views "
+        "WHERE schemaname NOT IN ('pg_catalog', 'information_schema') "
+        "UNION ALL "
+        "SELECT schemaname, matviewname, definition FROM pg_matviews"),
+    'mysql': text(
+        "SELECT TABLE_SCHEMA, TABLE_NAME, VIEW_DEFINITION "
+        "FROM information_schema.VIEWS"),
+    'mssql': text(
+        "SELECT s.name, v.name, m.definition FROM sys.views v "
+        "JOIN sys.schemas s ON s.schema_id = v.schema_id "
+        "JOIN sys.sql_modules m ON m.object_id = v.object_id"),
+    'sqlite': text("SELECT NULL, name, sql FROM sqlite_master "
+                   "WHERE type = 'view'"),
+}
+_CATALOG_QUERIES['mariadb'] = _CATALOG_QUERIES['mysql']
+
+_MATERIALIZED_QUERIES = {
+    'postgresql': text("SELECT schemaname, matviewname FROM pg_matviews"),
+}
+
+# Options and check options are stored apart from the definition.
+_OPTION_QUERIES = {
+    'postgresql': text(
+        "SELECT n.nspname, c.relname, c.reloptions FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind IN ('v', 'm') "
+        "AND n.nspname NOT IN ('pg_catalog', 'information_schema')"),
+    'mysql': text(
+        "SELECT TABLE_SCHEMA, TABLE_NAME, CHECK_OPTION "
+        "FROM information_schema.VIEWS"),
+}
+_OPTION_QUERIES['mariadb'] = _OPTION_QUERIES['mysql']
+
+_CREATE_VIEW_PREFIX = re.compile(
+    r'^\s*create\s+(?:or\s+replace\s+|or\s+alter\s+)?(?:temp\w*\s+)?'
+    r'(?:secure\s+)?(?:materialized\s+)?view\s+.*?\s+as\s+',
+    re.IGNORECASE | re.DOTALL)
+
+
+def strip_definition(definition):
+    """Removes any leading ``CREATE VIEW ... AS`` from a definition."""
+    return _CREATE_VIEW_PREFIX.sub('', definition)
+
+
+_TOKEN = re.compile(
+    r"(?P<literal>'(?:[^']|'')*')"
+    r'|"(?P<quoted>(?:[^"]|"")*)"|`(?P<backquoted>[^`]*)`'
+    r'|\[(?P<bracketed>[^\]]*)\]'
+    r'|(?P<word>\w+)'
+    r'|(?P<operator><>|!=|<=|>=|::|\|\||\S)')
+
+# Binding strength of operators; a parenthesized expression binding more
+# strongly than the operators around it does not need its parentheses.
+_PRECEDENCE = {
+    'or': 1, 'and': 2, 'not': 3,
+    '=': 4, '<>': 4, '!=': 4, '<': 4, '>': 4, '<=': 4, '>=': 4,
+    'like': 4, 'ilike': 4, 'is': 4, 'in': 4, 'between': 4,
+    '+': 5, '-': 5, '||': 5, '*': 6, '/': 6, '%': 6,
+}
+# Tokens around a parenthesized expression that bind nothing.
+_BOUNDARIES = frozenset([
+    None, ',', 'select', 'from', 'where', 'on', 'having', 'when', 'then',
+    'else', 'as', 'by'])
+_SUBQUERY_KEYWORDS = frozenset(['select', 'with', 'values'])
+
+
+def _tokens(definition):
+    for match in _TOKEN.finditer(definition):
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'literal':
+            yield token
+        elif kind in ('quoted', 'backquoted', 'bracketed'):
+            yield token.replace('""', '"').lower()
+        else:
+            yield token.lower()
+
+
+def _group(tokens):
+    stack = [[]]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')' and len(stack) > 1:
+            group = stack.pop()
+            stack[-1].append(group)
+        else:
+            stack[-1].append(token)
+    while len(stack) > 1:
+        group = stack.pop()
+        stack[-1].append('(')
+        stack[-1].extend(group)
+    return stack[0]
+
+
+def _binding(items):
+    """Returns how strongly the top-level operators of items bind, None
+    for anything that must keep its parentheses."""
+    if not items or items[0] in _SUBQUERY_KEYWORDS or ',' in items:
+        return None
+    binding = 7
+    depth = 0
+    for item in items:
+        if item == 'case':
+            depth += 1
+        elif item == 'end' and depth:
+            depth -= 1
+        elif not depth and not isinstance(item, list):
+            binding = min(binding, _PRECEDENCE.get(item, 7))
+    return binding
+
+
+def _surrounding(item):
+    if isinstance(item, list):
+        return None
+    if item in _BOUNDARIES:
+        return 0
+    return _PRECEDENCE.get(item)
+
+
+def _strip_parentheses(items):
+    stripped = []
+    for i, item in enumerate(items):
+        if not isinstance(item, list):
+            stripped.append(item)
+            continue
+        group = _strip_parentheses(item)
+        before = _surrounding(items[i - 1] if i else None)
+        after = _surrounding(items[i + 1] if i + 1 < len(items) else None)
+        binding = _binding(group)
+        if before is None or after is None:
+            redundant = False
+        elif len(items) == 1:
+            # Parentheses around everything, even a subquery.
+            redundant = True
+        else:
+            redundant = binding is not None and binding > max(before, after)
+        if redundant:
+            stripped.extend(group)
+        else:
+            stripped.append(group)
+    return stripped
+
+
+def _render(items):
+    rendered = []
+    for item in items:
+        if isinstance(item, list):
+            rendered.append('(%s)' % _render(item))
+        else:
+            rendered.append(item)
+    return ' '.join(rendered)
+
+
+def _unqualify(tokens, schema):
+    """Removes the ``schema.`` qualifiers and ``col AS col`` aliases MySQL
+    adds when it stores a definition."""
+    schema = schema.lower() if schema else None
+    kept = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if (token == schema and following == '.'
+                and (not kept or kept[-1] != '.')):
+            i += 2
+            continue
+        if (token == 'as' and kept and following == kept[-1]
+                and (i + 2 == len(tokens) or tokens[i + 2] in (',', 'from'))):
+            i += 2
+            continue
+        kept.append(token)
+        i += 1
+    return kept
+
+
+def normalize_definition(definition, schema=None):
+    """
+    Reduces a view definition to a canonical form for comparison.
+
+    Any leading ``CREATE VIEW ... AS`` and a trailing semicolon are removed,
+    whitespace and identifier quotes are dropped and everything but string
+    literals is lowercased. Parentheses are removed where operator
+    precedence makes them redundant, e.g. ``WHERE (a = 1)``, and so are
+    aliases repeating the column name, e.g. ``t1.col1 AS col1``. Definitions
+    the database rewrites in other ways (e.g. added casts) will still compare
+    as different.
+
+    Parameters
+    ----------
+    definition: str
+        The definition to normalize.
+    schema: str
+        The schema of the view; names qualified with it, as MySQL stores
+        them, are reduced to unqualified names.
+    """
+    if definition is None:
+        return None
+    definition = _CREATE_VIEW_PREFIX.sub('', definition).strip()
+    tokens = _unqualify(list(_tokens(definition)), schema)
+    while tokens and tokens[-1] == ';':
+        tokens.pop()
+    return _render(_strip_parentheses(_group(tokens)))
+
+
+def load_view_definitions(connection):
+    """
+    Reads the definitions of all views with a single catalog query.
+
+    PostgreSQL materialized views are included; other databases without a
+    known catalog query fall back to the SQLAlchemy inspector.
+
+    Returns
+    -------
+    dict
+        Maps ``(schema, name)`` to the definition stored in the catalog.
+        The default schema is reported as ``None``.
+    """
+    dialect = connection.dialect
+    default_schema = dialect.default_schema_name
+    query = _CATALOG_QUERIES.get(dialect.name)
+    definitions = {}
+    if query is None:
+        inspector = inspect(connection)
+        for name in inspector.get_view_names():
+            definitions[(None, name)] = inspector.get_view_definition(name)
+        return definitions
+    for schema, name, definition in connection.execute(query):
+        if schema == default_schema:
+            schema = None
+        definitions[(schema, name)] = definition
+    return definitions
+
+
+def load_materialized_view_names(connection):
+    """
+    Returns the ``(schema, name)`` of every materialized view, with the
+    default schema reported as ``None``. Empty on databases without
+    materialized views.
+    """
+    query = _MATERIALIZED_QUERIES.get(connection.dialect.name)
+    if query is None:
+        return set()
+    default_schema = connection.dialect.default_schema_name
+    return set((None if schema == default_schema else schema, name)
+               for schema, name in connection.execute(query))
+
+
+def _option_pairs(options):
+    return frozenset(tuple(option.lower().split('=', 1))
+                     for option in options or ())
+
+
+def load_view_options(connection):
+    """
+    Reads the options and check options of all views with a single catalog
+    query.
+
+    Returns
+    -------
+    dict or None
+        Maps ``(schema, name)`` to a frozenset of ``(option, value)`` pairs,
+        with the check option as ``('check_option', 'local')`` or
+        ``('check_option', 'cascaded')``. None on databases without a known
+        catalog query, where options cannot be compared.
+    """
+    query = _OPTION_QUERIES.get(connection.dialect.name)
+    if query is None:
+        return None
+    default_schema = connection.dialect.default_schema_name
+    options = {}
+    for schema, name, stored in connection.execute(query):
+        if schema == default_schema:
+            schema = None
+        if isinstance(stored, str):
+            stored = ([] if stored.upper() == 'NONE'
+                      else ['check_option=%s' % stored])
+        options[(schema, name)] = _option_pairs(stored)
+    return options
+
+
+def view_options(create_view):
+    """Returns the options and check option of a ``CreateView`` in the form
+    of :func:`load_view_options`."""
+    options = ['%s=%s' % item for item in (create_view.options or {}).items()]
+    if create_view.check_option:
+        options.append('check_option=%s' % (
+            'cascaded' if create_view.check_option is True
+            else create_view.check_option))
+    return _option_pairs(options)
+
+
+def compile_definition(create_view, dialect):
+    """Compiles the selectable of a ``CreateView`` the way it is rendered
+    in the CREATE VIEW statement, flattened if the view asks for it."""
+    return _compile_selectable(create_view,
+                               dialect.statement_compiler(dialect, None))
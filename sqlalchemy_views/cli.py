@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""The ``sqlalchemy-views`` command line tool.
+
+Views are loaded from a module path (see
+:func:`sqlalchemy_views.deploy.load_views`) and compared with the database
+at ``--url``::
+
+    sqlalchemy-views plan myapp.views --url postgresql://localhost/db
+    sqlalchemy-views apply myapp.views --url postgresql://localhost/db
+"""
+
+from __future__ import print_function
+
+import argparse
+import difflib
+import os
+import sys
+import time
+
+from sqlalchemy import MetaData, Table, create_engine, select, text
+
+from sqlalchemy_views import metadata
+from sqlalchemy_views.deploy import apply, load_views, plan
+from sqlalchemy_views.refresh import RefreshRunner
+
+
+class CommandError(Exception):
+    """An error reported as a message rather than a traceback."""
+
+
+def _load_views(path):
+    try:
+        return load_views(path)
+    except (ImportError, AttributeError) as e:
+        raise CommandError("cannot load views from %s: %s" % (path, e))
+
+
+def _plan(args, engine):
+    create_views = _load_views(args.module)
+    with engine.connect() as conn:
+        return plan(conn, create_views)
+
+
+def _statement_sql(statement, dialect):
+    return str(statement.compile(dialect=dialect)).strip()
+
+
+def plan_command(args, engine, out):
+    changes = [c for c in _plan(args, engine) if c.action != 'unchanged']
+    if not changes:
+        print('No changes.', file=out)
+        return 0
+    for change in changes:
+        print('-- %s: %s' % (change.action, change.name), file=out)
+        print('-- lock impact: %s' % change.lock_impact, file=out)
+        for statement in change.statements():
+            print('%s;' % _statement_sql(statement, engine.dialect), file=out)
+        print('', file=out)
+    return 0
+
+
+def diff_command(args, engine, out):
+    for change in _plan(args, engine):
+        if change.action in ('unchanged', 'create'):
+            continue
+        old = (change.old_definition or '').strip().splitlines()
+        new = change.new_definition.strip().splitlines()
+        for line in difflib.unified_diff(
+                old, new, 'database/%s' % change.name,
+                'module/%s' % change.name, lineterm=''):
+            print(line, file=out)
+    return 0
+
+
+def _print_applied(results, out):
+    for change, stats in results:
+        print('%s %s (%d attempts, %.3fs)'
+              % (change.action, change.name, stats.attempts, stats.seconds),
+              file=out)
+
+
+def apply_command(args, engine, out):
+    changes = _plan(args, engine)
+    try:
+        results = apply(engine, changes, workers=args.workers,
+                        lock_timeout=args.lock_timeout, retries=args.retries)
+    except Exception as e:
+        # Report what was applied before the failure, as it stays applied.
+        _print_applied(getattr(e, 'applied', []), out)
+        print('error: %s' % e, file=out)
+        return 1
+    _print_applied(results, out)
+    print('%d views changed, %d unchanged'
+          % (len(results), len(changes) - len(results)), file=out)
+    return 0
+
+
+def _table(name):
+    schema, _, name = name.rpartition('.')
+    return Table(name, MetaData(), schema=schema or None)
+
+
+def refresh_command(args, engine, out):
+    runner = RefreshRunner(engine, statement_timeout=args.statement_timeout,
+                           lock_timeout=args.lock_timeout,
+                           retries=args.retries)
+    status = 0
+    for result in runner.refresh_all([_table(v) for v in args.views],
+                                     concurrently=args.concurrently):
+        if result.ok:
+            print('refreshed %s in %.3fs' % (result.name, result.seconds),
+                  file=out)
+        else:
+            print('failed %s: %s' % (result.name, result.error), file=out)
+            status = 1
+    return status
+
+
+def bench_command(args, engine, out):
+    create_views = _load_views(args.module)
+    with engine.connect() as conn:
+        for create_view in create_views:
+            view = create_view.element
+            sample = select(text('*')).select_from(view).limit(args.limit)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                conn.execute(sample).fetchall()
+                timings.append(time.perf_counter() - start)
+            print('%-40s best %.3fms of %d' % (
+                view.fullname, min(timings) * 1000, args.repeat), file=out)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='sqlalchemy-views', description=metadata.description)
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s ' + metadata.version)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    def add(name, function, help, module=True):
+        subparser = subparsers.add_parser(name, help=help)
+        if module:
+            subparser.add_argument(
+                'module', help='module path holding the views, '
+                               'e.g. myapp.views or myapp.views:VIEWS')
+        subparser.add_argument('--url', required=True,
+                               help='database URL')
+        subparser.set_defaults(function=function)
+        return subparser
+
+    add('plan', plan_command, 'show the DDL that apply would run')
+    add('diff', diff_command, 'diff changed view definitions')
+    subparser = add('apply', apply_command, 'create and replace views')
+    subparser.add_argument('--workers', type=int, default=4)
+    subparser.add_argument('--lock-timeout', type=float, default=2.0)
+    subparser.add_argument('--retries', type=int, default=5)
+    subparser = add('refresh', refresh_command,
+                    'refresh materialized views', module=False)
+    subparser.add_argument('views', nargs='+', metavar='view',
+                           help='[schema.]name of a materialized view')
+    subparser.add_argument('--concurrently', action='store_true')
+    subparser.add_argument('--statement-timeout', type=float)
+    subparser.add_argument('--lock-timeout', type=float)
+    subparser.add_argument('--retries', type=int, default=3)
+    subparser = add('bench', bench_command, 'time a sample query per view')
+    subparser.add_argument('--repeat', type=int, default=5)
+    subparser.add_argument('--limit', type=int, default=100)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    # Like Alembic, make modules of the current directory importable, as
+    # console scripts do not have it on the path.
+    path = list(sys.path)
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    out = out or sys.stdout
+    engine = create_engine(args.url)
+    try:
+        return args.function(args, engine, out)
+    except CommandError as e:
+        print('error: %s' % e, file=out)
+        return 1
+    finally:
+        engine.dispose()
+        sys.path[:] = path
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""Load the dependencies of views from the database catalog.
+
+:func:`load_dependency_graph` reads which tables and views every view reads
+from with a single catalog query, and the resulting
+:class:`DependencyGraph` answers impact queries in memory::
+
+    graph = load_dependency_graph(conn)
+    graph.impact('orders')  # every view reading orders, directly or not
+
+:class:`DependencyCache` keeps the graph of an engine between calls and
+reloads it after DDL.
+"""
+
+import re
+import threading
+
+from sqlalchemy import event, text
+
+_DEPENDENCY_QUERIES = {
+    'postgresql': text(
+        "SELECT DISTINCT vn.nspname, v.relname, tn.nspname, t.relname "
+        "FROM pg_depend d "
+        "JOIN pg_rewrite r ON r.oid = d.objid "
+        "JOIN pg_class v ON v.oid = r.ev_class "
+        "JOIN pg_namespace vn ON vn.oid = v.relnamespace "
+        "JOIN pg_class t ON t.oid = d.refobjid "
+        "JOIN pg_namespace tn ON tn.oid = t.relnamespace "
+        "WHERE d.classid = 'pg_rewrite'::regclass "
+        "AND d.refclassid = 'pg_class'::regclass "
+        "AND d.deptype = 'n' AND v.oid <> t.oid "
+        "AND vn.nspname NOT IN ('pg_catalog', 'information_schema')"),
+    'mysql': text(
+        "SELECT VIEW_SCHEMA, VIEW_NAME, TABLE_SCHEMA, TABLE_NAME "
+        "FROM information_schema.VIEW_TABLE_USAGE"),
+    'mssql': text(
+        "SELECT OBJECT_SCHEMA_NAME(d.referencing_id), "
+        "OBJECT_NAME(d.referencing_id), "
+        "COALESCE(d.referenced_schema_name, "
+        "OBJECT_SCHEMA_NAME(d.referencing_id)), d.referenced_entity_name "
+        "FROM sys.sql_expression_dependencies d "
+        "JOIN sys.views v ON v.object_id = d.referencing_id"),
+}
+_DEPENDENCY_QUERIES['mariadb'] = _DEPENDENCY_QUERIES['mysql']
+
+# Cheap queries whose result changes whenever the schema does.
+_VERSION_QUERIES = {
+    # CREATE OR REPLACE VIEW rewrites the rule of the view in pg_rewrite
+    # without touching its pg_class row, so both are checked.
+    'postgresql': text(
+        "SELECT (SELECT count(*) FROM pg_class), "
+        "(SELECT sum(xmin::text::bigint) FROM pg_class), "
+        "(SELECT count(*) FROM pg_rewrite), "
+        "(SELECT sum(xmin::text::bigint) FROM pg_rewrite)"),
+    'mssql': text("SELECT count(*), max(modify_date) FROM sys.objects"),
+    'sqlite': text("PRAGMA schema_version"),
+}
+
+_SQLITE_OBJECTS = text(
+    "SELECT type, name, sql FROM sqlite_master "
+    "WHERE type IN ('table', 'view')")
+
+_IDENTIFIER = re.compile(r'"((?:[^"]|"")+)"|`([^`]+)`|\[([^\]]+)\]|(\w+)')
+
+_DDL = re.compile(r'^\s*(?:create|drop|alter|rename)\b', re.IGNORECASE)
+
+
+def _key(obj, default_schema=None):
+    if isinstance(obj, tuple):
+        schema, name = obj
+    elif hasattr(obj, 'name'):
+        schema, name = getattr(obj, 'schema', None), obj.name
+    else:
+        schema, _, name = obj.rpartition('.')
+        schema = schema or None
+    if schema == default_schema:
+        schema = None
+    return (schema, name)
+
+
+class DependencyGraph(object):
+    """
+    The objects each view reads from.
+
+    Objects are identified by ``(schema, name)`` with the default schema
+    reported as None. Methods taking an object also accept a
+    ``sqlalchemy.Table`` or a ``'[schema.]name'`` string.
+
+    Parameters
+    ----------
+    edges: iterable of tuple
+        ``(view, referenced object)`` pairs of ``(schema, name)`` keys.
+    """
+
+    def __init__(self, edges):
+        self._depends_on = {}
+        self._dependents = {}
+        for view, referenced in edges:
+            self._depends_on.setdefault(view, set()).add(referenced)
+            self._dependents.setdefault(referenced, set()).add(view)
+
+    @property
+    def views(self):
+        """The views that read from at least one object."""
+        return frozenset(self._depends_on)
+
+    def __contains__(self, obj):
+        key = _key(obj)
+        return key in self._depends_on or key in self._dependents
+
+    def depends_on(self, obj):
+        """Returns the objects a view reads from directly."""
+        return frozenset(self._depends_on.get(_key(obj), ()))
+
+    def dependents(self, obj):
+        """Returns the views reading from an object directly."""
+        return frozenset(self._dependents.get(_key(obj), ()))
+
+    def impact(self, obj):
+        """
+        Returns every view reading from an object, directly or through
+        other views.
+
+        Returns
+        -------
+        list of tuple
+            The affected views in dependency order, so views come after the
+            views they read from, and by name otherwise. Drop them in
+            reverse order.
+        """
+        affected = set()
+        stack = [_key(obj)]
+        while stack:
+            for view in self._dependents.get(stack.pop(), ()):
+                if view not in affected:
+                    affected.add(view)
+                    stack.append(view)
+        return self.sort(sorted(affected, key=lambda k: (k[0] or '', k[1])))
+
+    def sort(self, objs):
+        """
+        Orders objects so that each comes after the objects it reads from,
+        e.g. to refresh materialized views that read from each other.
+
+        Raises
+        ------
+        ValueError
+            If the objects depend on each other.
+        """
+        remaining = []
+        for obj in objs:
+            key = _key(obj)
+            if key not in remaining:
+                remaining.append(key)
+        pending = set(remaining)
+        ordered = []
+        while remaining:
+            ready = [key for key in remaining
+                     if not self._depends_on.get(key, set()) & pending]
+            if not ready:
+                raise ValueError("Views depend on each other: %s" % ', '.join(
+                    '.'.join(filter(None, key)) for key in remaining))
+            ordered.extend(ready)
+            pending.difference_update(ready)
+            remaining = [key for key in remaining if key in pending]
+        return ordered
+
+
+def _sqlite_edges(connection):
+    objects = list(connection.execute(_SQLITE_OBJECTS))
+    names = dict((name.lower(), name) for _, name, _ in objects)
+    for kind, name, sql in objects:
+        if kind != 'view' or not sql:
+            continue
+        for match in _IDENTIFIER.finditer(sql):
+            identifier = next(group for group in match.groups() if group)
+            referenced = names.get(identifier.replace('""', '"').lower())
+            if referenced is not None and referenced != name:
+                yield (None, name), (None, referenced)
+
+
+def load_dependency_graph(connection):
+    """
+    Reads the dependencies of all views with a single catalog query.
+
+    PostgreSQL dependencies come from ``pg_depend`` and include
+    materialized views, MySQL dependencies from
+    ``information_schema.VIEW_TABLE_USAGE`` (MySQL 8.0.13 or later) and SQL
+    Server dependencies from ``sys.sql_expression_dependencies``. SQLite
+    keeps no dependencies, so the view definitions are searched for the
+    names of tables and views.
+
+    Returns
+    -------
+    DependencyGraph
+    """
+    dialect = connection.dialect
+    if dialect.name == 'sqlite':
+        return DependencyGraph(_sqlite_edges(connection))
+    query = _DEPENDENCY_QUERIES.get(dialect.name)
+    if query is None:
+        raise NotImplementedError(
+            "Loading view dependencies is not supported on %s"
+            % dialect.name)
+    default_schema = dialect.default_schema_name
+    return DependencyGraph(
+        (_key((view_schema, view), default_schema),
+         _key((schema, name), default_schema))
+        for view_schema, view, schema, name in connection.execute(query))
+
+
+class DependencyCache(object):
+    """
+    The dependency graph of an engine, loaded once and reused.
+
+    The graph is reloaded after any ``CREATE``, ``DROP``, ``ALTER`` or
+    ``RENAME`` statement executed through the engine and, where the database
+    has a cheap way of telling (PostgreSQL, SQL Server and SQLite), after
+    the schema was changed by other clients.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        The database to read dependencies from.
+    listen: boolean
+        Whether to watch the statements executed through ``engine`` for DDL.
+    check_version: boolean
+        Whether to ask the database if the schema changed before returning
+        the cached graph, at the cost of one small query per call.
+    """
+
+    def __init__(self, engine, listen=True, check_version=True):
+        self.engine = engine
+        self.check_version = check_version
+        self._graph = None
+        self._version = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listening = False
+        if listen:
+            event.listen(engine, 'after_cursor_execute', self._on_execute)
+            self._listening = True
+
+    def _on_execute(self, conn, cursor, statement, parameters, context,
+                    executemany):
+        if _DDL.match(statement):
+            self.invalidate()
+
+    def invalidate(self):
+        """Discards the cached graph."""
+        with self._lock:
+            self._graph = None
+            self._version = None
+            self._generation += 1
+
+    def close(self):
+        """Stops watching the engine for DDL."""
+        if self._listening:
+            event.remove(self.engine, 'after_cursor_execute',
+                         self._on_execute)
+            self._listening = False
+
+    def _current_version(self, connection):
+        query = _VERSION_QUERIES.get(connection.dialect.name)
+        if not self.check_version or query is None:
+            return None
+        return tuple(connection.execute(query).first())
+
+    def graph(self, connection=None):
+        """
+        Returns the dependency graph, loading it if needed.
+
+        Parameters
+        ----------
+        connection: sqlalchemy.engine.Connection
+            The connection to query with; a new connection of the engine is
+            used when omitted.
+
+        Returns
+        -------
+        DependencyGraph
+        """
+        if connection is None:
+            with self.engine.connect() as conn:
+                return self.graph(conn)
+        version = self._current_version(connection)
+        with self._lock:
+            if self._graph is not None and self._version == version:
+                return self._graph
+            generation = self._generation
+        graph = load_dependency_graph(connection)
+        with self._lock:
+            # Keep the graph only if no DDL ran while it was loaded.
+            if generation == self._generation:
+                self._graph = graph
+                self._version = version
+        return graph
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""Plan and apply the deployment of a collection of views."""
+
+import copy
+import importlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.expression import TableClause
+
+from sqlalchemy_views.catalog import (
+    compile_definition, load_view_definitions, load_view_options,
+    normalize_definition, strip_definition, view_options)
+from sqlalchemy_views.locks import execute_ddl
+from sqlalchemy_views.views import CreateView, DropView
+
+# Dialects that cannot replace a view in place.
+_NO_OR_REPLACE = frozenset(['sqlite', 'mssql'])
+
+LOCK_IMPACT = {
+    'create': 'none, a new object is created',
+    'replace': 'exclusive lock on the view while its definition is swapped; '
+               'waits for running readers of the view',
+    'rebuild': 'view dropped and recreated in one transaction; readers '
+               'wait until it is rebuilt',
+    'unchanged': 'none',
+}
+
+
+def _key(element):
+    return (getattr(element, 'schema', None), element.name)
+
+
+def load_views(path):
+    """
+    Loads view definitions from a module.
+
+    Parameters
+    ----------
+    path: str
+        ``package.module`` to collect every ``CreateView`` defined at the top
+        level of the module (directly or in lists and tuples), or
+        ``package.module:name`` for a single attribute holding a
+        ``CreateView``, an iterable of them, or a callable returning one.
+
+    Returns
+    -------
+    list of CreateView
+    """
+    module_name, _, attribute = path.partition(':')
+    module = importlib.import_module(module_name)
+    if attribute:
+        value = getattr(module, attribute)
+        if callable(value) and not isinstance(value, CreateView):
+            value = value()
+        values = [value]
+    else:
+        values = list(vars(module).values())
+
+    create_views = []
+    for value in values:
+        if isinstance(value, CreateView):
+            create_views.append(value)
+        elif isinstance(value, (list, tuple)) or (
+                attribute and not isinstance(value, str)):
+            create_views.extend(v for v in value if isinstance(v, CreateView))
+    return create_views
+
+
+def dependency_levels(create_views):
+    """
+    Groups views so that each one comes after the views it reads from.
+
+    Views in the same group do not depend on each other and can be created
+    in parallel. Only references to the given views through SQLAlchemy
+    tables are detected; textual selectables have no dependencies.
+
+    Returns
+    -------
+    list of lists of CreateView
+    """
+    by_key = dict((_key(cv.element), cv) for cv in create_views)
+    depends_on = {}
+    for key, create_view in by_key.items():
+        found = set()
+        selectable = create_view.selectable
+        if hasattr(selectable, 'get_children'):
+            for obj in visitors.iterate(selectable):
+                if isinstance(obj, TableClause) and _key(obj) in by_key:
+                    found.add(_key(obj))
+        found.discard(key)
+        depends_on[key] = found
+
+    levels = []
+    done = set()
+    remaining = [_key(cv.element) for cv in create_views]
+    while remaining:
+        level = [key for key in remaining if depends_on[key] <= done]
+        if not level:
+            raise ValueError("Views depend on each other: %s" % ', '.join(
+                '.'.join(filter(None, key)) for key in remaining))
+        levels.append([by_key[key] for key in level])
+        done.update(level)
+        remaining = [key for key in remaining if key not in done]
+    return levels
+
+
+class Change(namedtuple('Change', ['create_view', 'action',
+                                   'old_definition', 'new_definition'])):
+    """
+    The planned change to one view.
+
+    ``action`` is ``'create'``, ``'replace'``, ``'rebuild'`` (drop and
+    create, for materialized views and databases without
+    ``CREATE OR REPLACE``) or ``'unchanged'``.
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.create_view.element.fullname
+
+    @property
+    def lock_impact(self):
+        return LOCK_IMPACT[self.action]
+
+    def statements(self):
+        """Returns the statements applying the change, in order."""
+        create_view = self.create_view
+        if self.action == 'create':
+            return [create_view]
+        if self.action == 'replace':
+            create_view = copy.copy(create_view)
+            create_view.or_replace = True
+            return [create_view]
+        if self.action == 'rebuild':
+            return [DropView(create_view.element,
+                             materialized=create_view.materialized),
+                    create_view]
+        return []
+
+
+def plan(connection, create_views, definitions=None):
+    """
+    Compares view definitions with the database.
+
+    The existing definitions are read with one catalog query, and so are
+    the options and check options where the database reports them.
+
+    Parameters
+    ----------
+    connection: sqlalchemy.engine.Connection
+        The database to compare with.
+    create_views: iterable of CreateView
+        The views to deploy.
+    definitions: dict
+        Definitions already compiled for the dialect of ``connection``, by
+        ``(schema, name)`` of the view; the others are compiled here.
+
+    Returns
+    -------
+    list of Change
+        One change per view, in dependency order.
+    """
+    existing = load_view_definitions(connection)
+    existing_options = load_view_options(connection)
+    default_schema = connection.dialect.default_schema_name
+    changes = []
+    for level in dependency_levels(create_views):
+        for create_view in level:
+            schema, name = _key(create_view.element)
+            if schema == default_schema:
+                schema = None
+            old = existing.get((schema, name))
+            new = (definitions or {}).get(_key(create_view.element))
+            if new is None:
+                new = compile_definition(create_view, connection.dialect)
+            options = view_options(create_view)
+            old_options = (options if existing_options is None
+                           else existing_options.get((schema, name),
+                                                     frozenset()))
+            qualifier = schema or default_schema
+            if old is None:
+                action = 'create'
+            elif (normalize_definition(old, qualifier)
+                  == normalize_definition(new, qualifier)
+                  and old_options == options):
+                action = 'unchanged'
+            elif (create_view.materialized
+                  or connection.dialect.name in _NO_OR_REPLACE):
+                action = 'rebuild'
+            else:
+                action = 'replace'
+            changes.append(Change(
+                create_view, action,
+                strip_definition(old) if old is not None else None, new))
+    return changes
+
+
+def apply(engine, changes, workers=4, lock_timeout=2.0, retries=5):
+    """
+    Applies planned changes, in parallel where dependencies allow.
+
+    Each change runs in its own transaction through
+    :func:`~sqlalchemy_views.locks.execute_ddl`. Changes whose views do not
+    depend on each other run concurrently on up to ``workers`` connections;
+    a group of dependent views starts once the group before it is done.
+
+    Returns
+    -------
+    list of tuple
+        ``(change, stats)`` for every change that was not ``'unchanged'``.
+
+    Raises
+    ------
+    Exception
+        The first error of a group, after the rest of the group finished.
+        Its ``applied`` attribute holds the ``(change, stats)`` pairs of
+        the changes applied before and alongside the failed one.
+    """
+    return _apply(engine, changes, workers, lock_timeout, retries,
+                  lambda change: change.statements())
+
+
+def _apply(engine, changes, workers, lock_timeout, retries, statements):
+    pending = dict((_key(c.create_view.element), c) for c in changes
+                   if c.action != 'unchanged')
+    levels = dependency_levels([c.create_view for c in changes])
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level in levels:
+            level = [pending[_key(cv.element)] for cv in level
+                     if _key(cv.element) in pending]
+            futures = [(change, executor.submit(
+                execute_ddl, engine, statements(change),
+                lock_timeout=lock_timeout, retries=retries))
+                for change in level]
+            errors = []
+            for change, future in futures:
+                try:
+                    results.append((change, future.result()))
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                errors[0].applied = results
+                raise errors[0]
+    return results
+
+
+class ShardResult(namedtuple('ShardResult', ['engine', 'results', 'error',
+                                             'skipped'])):
+    """
+    The outcome of deploying views to one shard.
+
+    ``results`` holds the ``(change, stats)`` pairs of :func:`apply`,
+    including those applied before a failure, ``error`` the exception that
+    stopped the deployment, and ``skipped`` is true for shards left alone
+    because a canary failed.
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return repr(self.engine.url)
+
+    @property
+    def ok(self):
+        return self.error is None and not self.skipped
+
+
+class _CompiledViews(object):
+    """Definitions and statements compiled once for every shard of a
+    dialect."""
+
+    def __init__(self, create_views, dialect):
+        self.dialect = dialect
+        self.definitions = dict(
+            (_key(cv.element), compile_definition(cv, dialect))
+            for cv in create_views)
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def statements(self, change):
+        key = (_key(change.create_view.element), change.action)
+        with self._lock:
+            if key not in self._statements:
+                self._statements[key] = [
+                    str(statement.compile(dialect=self.dialect))
+                    for statement in change.statements()]
+            return self._statements[key]
+
+
+def fan_out(engines, create_views, canaries=1, shards=8, workers=1,
+            lock_timeout=2.0, retries=5):
+    """
+    Deploys the same views to many databases, e.g. the shards of a
+    partitioned installation.
+
+    Every view is compiled once per dialect and server version, and the
+    compiled DDL is shared by all shards using them. The first
+    ``canaries`` shards are deployed first; if any of them fails, the
+    other shards are skipped. The rest are then planned and applied
+    concurrently.
+
+    Parameters
+    ----------
+    engines: list of sqlalchemy.engine.Engine
+        The shards, canaries first.
+    create_views: iterable of CreateView
+        The views to deploy.
+    canaries: int
+        Number of shards deployed before the others.
+    shards: int
+        Number of shards deployed at the same time.
+    workers: int
+        Number of connections per shard applying changes at the same time;
+        see :func:`apply`.
+    lock_timeout: float
+        Seconds each statement may wait for a lock.
+    retries: int
+        Number of retries after a lock timeout.
+
+    Returns
+    -------
+    list of ShardResult
+        One result per engine, in the order of ``engines``.
+    """
+    create_views = list(create_views)
+    compiled = {}
+    compiled_lock = threading.Lock()
+
+    def compiled_views(dialect):
+        key = (dialect.name, dialect.server_version_info)
+        with compiled_lock:
+            if key not in compiled:
+                compiled[key] = _CompiledViews(create_views, dialect)
+            return compiled[key]
+
+    def deploy(engine):
+        try:
+            with engine.connect() as conn:
+                views = compiled_views(conn.dialect)
+                changes = plan(conn, create_views, views.definitions)
+            results = _apply(engine, changes, workers, lock_timeout,
+                             retries, views.statements)
+        except Exception as e:
+            return ShardResult(engine, getattr(e, 'applied', []), e, False)
+        return ShardResult(engine, results, None, False)
+
+    engines = list(engines)
+    with ThreadPoolExecutor(max_workers=max(shards, 1)) as executor:
+        results = list(executor.map(deploy, engines[:canaries]))
+        if all(result.ok for result in results):
+            results.extend(executor.map(deploy, engines[canaries:]))
+        else:
+            results.extend(ShardResult(engine, [], None, True)
+                           for engine in engines[canaries:])
+    return results
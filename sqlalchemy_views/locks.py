@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Timeouts, lock errors and backoff shared by the DDL runners."""
+
+import random
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+# PostgreSQL lock_not_available, raised when lock_timeout expires.
+_PG_LOCK_NOT_AVAILABLE = '55P03'
+# MySQL ER_LOCK_WAIT_TIMEOUT.
+_MYSQL_LOCK_WAIT_TIMEOUT = 1205
+
+
+def set_timeouts(connection, statement_timeout=None, lock_timeout=None):
+    """
+    Limits how long statements of the current transaction may run and
+    wait for locks. Timeouts are in seconds.
+
+    PostgreSQL uses ``SET LOCAL``, so the settings end with the
+    transaction. MySQL only supports the lock timeout, which is set as
+    ``lock_wait_timeout`` for the session. Other databases are left as
+    they are.
+    """
+    name = connection.dialect.name
+    if name == 'postgresql':
+        if statement_timeout is not None:
+            connection.execute(text("SET LOCAL statement_timeout = %d"
+                                    % int(statement_timeout * 1000)))
+        if lock_timeout is not None:
+            connection.execute(text("SET LOCAL lock_timeout = %d"
+                                    % int(lock_timeout * 1000)))
+    elif name in ('mysql', 'mariadb'):
+        if lock_timeout is not None:
+            # lock_wait_timeout is a whole number of seconds, at least 1.
+            connection.execute(text("SET SESSION lock_wait_timeout = %d"
+                                    % max(int(lock_timeout), 1)))
+
+
+def reset_timeouts(connection):
+    """
+    Restores the session settings changed by :func:`set_timeouts`, so
+    they do not leak to other users of a pooled connection.
+    """
+    if connection.dialect.name in ('mysql', 'mariadb'):
+        connection.execute(text("SET SESSION lock_wait_timeout = DEFAULT"))
+
+
+def is_lock_timeout(error):
+    """Whether a database error means a lock could not be acquired in time."""
+    if not isinstance(error, DBAPIError):
+        return False
+    orig = error.orig
+    code = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    if code == _PG_LOCK_NOT_AVAILABLE:
+        return True
+    args = getattr(orig, 'args', ())
+    if args and args[0] == _MYSQL_LOCK_WAIT_TIMEOUT:
+        return True
+    return 'database is locked' in str(orig)
+
+
+def backoff_delay(attempt, base=0.5, maximum=30.0):
+    """
+    Returns the seconds to wait before retry number ``attempt`` (from 0).
+
+    Delays grow exponentially up to ``maximum`` and are fully jittered, so
+    concurrent clients do not retry in lockstep.
+    """
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class ExecutionStats(namedtuple('ExecutionStats',
+                                ['attempts', 'waited', 'seconds'])):
+    """
+    How a statement made it through :func:`execute_ddl`.
+
+    ``attempts`` counts the transactions tried, ``waited`` is the time
+    spent in backoff between them and ``seconds`` the total duration, all
+    in seconds.
+    """
+
+    __slots__ = ()
+
+    @property
+    def retries(self):
+        return self.attempts - 1
+
+
+class LockTimeoutError(Exception):
+    """
+    Raised by :func:`execute_ddl` when every attempt timed out waiting
+    for locks. ``stats`` holds the :class:`ExecutionStats` of the run and
+    ``error`` the database error of the last attempt.
+    """
+
+    def __init__(self, message, stats, error):
+        super(LockTimeoutError, self).__init__(message)
+        self.stats = stats
+        self.error = error
+
+
+def execute_ddl(engine, statements, lock_timeout=2.0, retries=5,
+                backoff=0.5, max_backoff=30.0):
+    """
+    Executes DDL such as ``CreateView`` and ``DropView`` without queuing
+    behind long-running queries.
+
+    The statements run in one transaction with a short lock timeout, so a
+    statement waiting for a busy view gives up quickly instead of blocking
+    every query queued behind it. Attempts that time out are retried after
+    a jittered exponential backoff.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        The database to execute the statements in.
+    statements: executable, str or list
+        A statement, or statements to execute in one transaction. Strings
+        are passed to the driver as they are, e.g. DDL compiled in advance.
+    lock_timeout: float
+        Seconds each attempt may wait for a lock (``SET LOCAL lock_timeout``
+        on PostgreSQL, ``lock_wait_timeout`` on MySQL).
+    retries: int
+        Number of retries after a lock timeout.
+    backoff: float
+        Base delay in seconds between retries.
+    max_backoff: float
+        Upper bound of the delay between retries.
+
+    Returns
+    -------
+    ExecutionStats
+
+    Raises
+    ------
+    LockTimeoutError
+        If the last attempt timed out too. Other database errors are
+        raised as they are.
+    """
+    if not isinstance(statements, (list, tuple)):
+        statements = [statements]
+    start = time.monotonic()
+    waited = 0.0
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with engine.connect() as conn:
+                try:
+                    with conn.begin():
+                        set_timeouts(conn, lock_timeout=lock_timeout)
+                        for statement in statements:
+                            if isinstance(statement, str):
+                                conn.exec_driver_sql(statement)
+                            else:
+                                conn.execute(statement)
+                finally:
+                    reset_timeouts(conn)
+        except Exception as e:
+            if not is_lock_timeout(e):
+                raise
+            if attempt > retries:
+                stats = ExecutionStats(attempt, waited,
+                                       time.monotonic() - start)
+                raise LockTimeoutError(
+                    "Gave up waiting for locks after %d attempts" % attempt,
+                    stats, e)
+            delay = backoff_delay(attempt - 1, backoff, max_backoff)
+            time.sleep(delay)
+            waited += delay
+        else:
+            return ExecutionStats(attempt, waited, time.monotonic() - start)
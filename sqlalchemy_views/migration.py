@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""Alembic operations and autogenerate support for views.
+
+Importing this module registers ``op.create_view``, ``op.replace_view`` and
+``op.drop_view`` with Alembic, along with an autogenerate comparator.
+Pass the views to compare through ``context.configure`` in ``env.py``::
+
+    import sqlalchemy_views.migration  # noqa
+
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        view_definitions=[create_my_view, create_other_view],
+    )
+
+Each entry of ``view_definitions`` is a :class:`~sqlalchemy_views.CreateView`.
+The view ``Table`` objects should not be part of ``target_metadata``,
+otherwise Alembic will also try to create them as tables.
+"""
+
+from alembic.autogenerate import comparators, renderers
+from alembic.operations import MigrateOperation, Operations
+from sqlalchemy import Column, MetaData, Table, text
+
+from sqlalchemy_views.catalog import (  # noqa
+    compile_definition, load_materialized_view_names, load_view_definitions,
+    load_view_options, normalize_definition, strip_definition, view_options)
+from sqlalchemy_views.views import CreateView, DropView
+
+
+@Operations.register_operation("create_view")
+class CreateViewOp(MigrateOperation):
+    """
+    Creates a view.
+
+    Parameters
+    ----------
+    view_name: str
+        Name of the view.
+    definition: str
+        The SELECT statement defining the view.
+    schema: str
+        Schema of the view.
+    materialized: boolean
+        If True, a materialized view is created.
+    columns: list of str
+        Names of the columns of the view, if they are listed.
+    options: dict
+        View options rendered as ``WITH (...)``.
+    check_option: str or boolean
+        ``'local'``, ``'cascaded'`` or True to add a check option.
+    """
+
+    def __init__(self, view_name, definition, schema=None,
+                 materialized=False, columns=None, options=None,
+                 check_option=None):
+        self.view_name = view_name
+        self.definition = definition
+        self.schema = schema
+        self.materialized = materialized
+        self.columns = columns
+        self.options = options
+        self.check_option = check_option
+
+    @classmethod
+    def create_view(cls, operations, view_name, definition, schema=None,
+                    materialized=False, columns=None, options=None,
+                    check_option=None):
+        """Issues a CREATE VIEW statement."""
+        return operations.invoke(cls(
+            view_name, definition, schema=schema, materialized=materialized,
+            columns=columns, options=options, check_option=check_option))
+
+    def reverse(self):
+        return DropViewOp(self.view_name, schema=self.schema,
+                          definition=self.definition,
+                          materialized=self.materialized,
+                          columns=self.columns, options=self.options,
+                          check_option=self.check_option)
+
+
+@Operations.register_operation("replace_view")
+class ReplaceViewOp(MigrateOperation):
+    """
+    Replaces the definition of an existing view.
+
+    Parameters
+    ----------
+    view_name: str
+        Name of the view.
+    definition: str
+        The new SELECT statement defining the view.
+    schema: str
+        Schema of the view.
+    old_definition: str
+        The previous definition, used to reverse the operation.
+    materialized: boolean
+        If True, the materialized view is dropped and created again, as
+        materialized views cannot be replaced in place.
+    columns: list of str
+        Names of the columns of the view, if they are listed.
+    options: dict
+        View options rendered as ``WITH (...)``.
+    check_option: str or boolean
+        ``'local'``, ``'cascaded'`` or True to add a check option.
+    old_options: dict
+        The previous options, used to reverse the operation.
+    old_check_option: str or boolean
+        The previous check option, used to reverse the operation.
+    """
+
+    def __init__(self, view_name, definition, schema=None,
+                 old_definition=None, materialized=False, columns=None,
+                 options=None, check_option=None, old_options=None,
+                 old_check_option=None):
+        self.view_name = view_name
+        self.definition = definition
+        self.schema = schema
+        self.old_definition = old_definition
+        self.materialized = materialized
+        self.columns = columns
+        self.options = options
+        self.check_option = check_option
+        self.old_options = old_options
+        self.old_check_option = old_check_option
+
+    @classmethod
+    def replace_view(cls, operations, view_name, definition, schema=None,
+                     old_definition=None, materialized=False, columns=None,
+                     options=None, check_option=None, old_options=None,
+                     old_check_option=None):
+        """Issues a CREATE OR REPLACE VIEW statement, or DROP and CREATE
+        for a materialized view."""
+        return operations.invoke(cls(
+            view_name, definition, schema=schema,
+            old_definition=old_definition, materialized=materialized,
+            columns=columns, options=options, check_option=check_option,
+            old_options=old_options, old_check_option=old_check_option))
+
+    def reverse(self):
+        if self.old_definition is None:
+            raise ValueError(
+                "Cannot reverse replace_view of %s without old_definition"
+                % self.view_name)
+        return ReplaceViewOp(self.view_name, self.old_definition,
+                             schema=self.schema,
+                             old_definition=self.definition,
+                             materialized=self.materialized,
+                             columns=self.columns, options=self.old_options,
+                             check_option=self.old_check_option,
+                             old_options=self.options,
+                             old_check_option=self.check_option)
+
+
+@Operations.register_operation("drop_view")
+class DropViewOp(MigrateOperation):
+    """
+    Drops a view.
+
+    Parameters
+    ----------
+    view_name: str
+        Name of the view.
+    schema: str
+        Schema of the view.
+    definition: str
+        The definition of the dropped view, used to reverse the operation.
+    materialized: boolean
+        If True, a materialized view is dropped.
+    columns, options, check_option:
+        The clauses of the dropped view, used to reverse the operation.
+    """
+
+    def __init__(self, view_name, schema=None, definition=None,
+                 materialized=False, columns=None, options=None,
+                 check_option=None):
+        self.view_name = view_name
+        self.schema = schema
+        self.definition = definition
+        self.materialized = materialized
+        self.columns = columns
+        self.options = options
+        self.check_option = check_option
+
+    @classmethod
+    def drop_view(cls, operations, view_name, schema=None, definition=None,
+                  materialized=False, columns=None, options=None,
+                  check_option=None):
+        """Issues a DROP VIEW statement."""
+        return operations.invoke(cls(
+            view_name, schema=schema, definition=definition,
+            materialized=materialized, columns=columns, options=options,
+            check_option=check_option))
+
+    def reverse(self):
+        if self.definition is None:
+            raise ValueError(
+                "Cannot reverse drop_view of %s without definition"
+                % self.view_name)
+        return CreateViewOp(self.view_name, self.definition,
+                            schema=self.schema,
+                            materialized=self.materialized,
+                            columns=self.columns, options=self.options,
+                            check_option=self.check_option)
+
+
+def _view(operation):
+    columns = [Column(name) for name in operation.columns or []]
+    return Table(operation.view_name, MetaData(), *columns,
+                 schema=operation.schema)
+
+
+def _create_view(operation, **kwargs):
+    return CreateView(_view(operation), text(operation.definition),
+                      materialized=operation.materialized,
+                      options=operation.options,
+                      check_option=operation.check_option, **kwargs)
+
+
+@Operations.implementation_for(CreateViewOp)
+def create_view(operations, operation):
+    operations.execute(_create_view(operation))
+
+
+@Operations.implementation_for(ReplaceViewOp)
+def replace_view(operations, operation):
+    if operation.materialized:
+        operations.execute(DropView(_view(operation), materialized=True))
+        operations.execute(_create_view(operation))
+        return
+    operations.execute(_create_view(operation, or_replace=True))
+
+
+@Operations.implementation_for(DropViewOp)
+def drop_view(operations, operation):
+    operations.execute(DropView(_view(operation),
+                                materialized=operation.materialized))
+
+
+def _render_args(*args, **kwargs):
+    rendered = [repr(arg) for arg in args]
+    rendered += ['%s=%r' % (key, value)
+                 for key, value in sorted(kwargs.items())
+                 if value is not None]
+    return ', '.join(rendered)
+
+
+def _clauses(operation):
+    return dict(materialized=operation.materialized or None,
+                columns=operation.columns, options=operation.options,
+                check_option=operation.check_option)
+
+
+@renderers.dispatch_for(CreateViewOp)
+def render_create_view(autogen_context, operation):
+    return 'op.create_view(%s)' % _render_args(
+        operation.view_name, operation.definition, schema=operation.schema,
+        **_clauses(operation))
+
+
+@renderers.dispatch_for(ReplaceViewOp)
+def render_replace_view(autogen_context, operation):
+    return 'op.replace_view(%s)' % _render_args(
+        operation.view_name, operation.definition, schema=operation.schema,
+        old_definition=operation.old_definition,
+        old_options=operation.old_options,
+        old_check_option=operation.old_check_option,
+        **_clauses(operation))
+
+
+@renderers.dispatch_for(DropViewOp)
+def render_drop_view(autogen_context, operation):
+    return 'op.drop_view(%s)' % _render_args(
+        operation.view_name, schema=operation.schema,
+        definition=operation.definition, **_clauses(operation))
+
+
+# CreateView clauses the operations cannot express.
+_UNSUPPORTED_CLAUSES = ('secure', 'late_binding', 'cluster_by')
+
+
+def _split_options(pairs):
+    """Returns the options and check option of :func:`view_options` pairs
+    as op arguments."""
+    options = dict((key, value) for key, value in pairs
+                   if key != 'check_option')
+    check_option = dict(pairs).get('check_option')
+    return options or None, check_option
+
+
+@comparators.dispatch_for("schema")
+def compare_views(autogen_context, upgrade_ops, schemas):
+    """
+    Emits view operations for the ``view_definitions`` given to Alembic.
+
+    All existing definitions are loaded with one catalog query; only views
+    that are missing or whose normalized definition, options or check option
+    changed produce an operation. Options are compared on PostgreSQL and
+    MySQL only, and column lists are carried into the operations but not
+    compared. Views that exist in the database but are not defined are
+    dropped only if ``include_view_drops=True`` is passed to
+    ``context.configure``. Materialized views are created, replaced and
+    dropped as such.
+
+    Raises
+    ------
+    ValueError
+        If a view is declared with ``secure``, ``late_binding`` or
+        ``cluster_by``, which the operations cannot express.
+    """
+    create_views = autogen_context.opts.get('view_definitions')
+    if not create_views:
+        return
+    connection = autogen_context.connection
+    dialect = autogen_context.dialect
+    existing = load_view_definitions(connection)
+    existing_options = load_view_options(connection)
+    materialized = load_materialized_view_names(connection)
+
+    defined = set()
+    for create_view in create_views:
+        view = create_view.element
+        if view.schema not in schemas:
+            continue
+        unsupported = [clause for clause in _UNSUPPORTED_CLAUSES
+                       if getattr(create_view, clause)]
+        if unsupported:
+            raise ValueError(
+                "Cannot autogenerate view %s: %s not supported by the view "
+                "operations" % (view.fullname, ', '.join(unsupported)))
+        key = (view.schema, view.name)
+        defined.add(key)
+        definition = compile_definition(create_view, dialect)
+        options = view_options(create_view)
+        columns = [col.element.name for col in create_view.columns]
+        clauses = dict(
+            materialized=create_view.materialized, columns=columns or None,
+            options=create_view.options or None,
+            check_option=create_view.check_option or None)
+        schema = view.schema or dialect.default_schema_name
+        if key not in existing:
+            upgrade_ops.ops.append(CreateViewOp(
+                view.name, definition, schema=view.schema, **clauses))
+            continue
+        old_options = (options if existing_options is None
+                       else existing_options.get(key, frozenset()))
+        if (normalize_definition(existing[key], schema)
+                != normalize_definition(definition, schema)
+                or old_options != options):
+            old_options, old_check_option = _split_options(old_options)
+            upgrade_ops.ops.append(ReplaceViewOp(
+                view.name, definition, schema=view.schema,
+                old_definition=strip_definition(existing[key]),
+                old_options=old_options, old_check_option=old_check_option,
+                **clauses))
+
+    if autogen_context.opts.get('include_view_drops'):
+        for key in sorted(existing, key=lambda k: (k[0] or '', k[1])):
+            if key not in defined and key[0] in schemas:
+                options, check_option = _split_options(
+                    (existing_options or {}).get(key, ()))
+                upgrade_ops.ops.append(DropViewOp(
+                    key[1], schema=key[0],
+                    definition=strip_definition(existing[key]),
+                    materialized=key in materialized, options=options,
+                    check_option=check_option))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Map ORM classes onto views.
+
+Mix :class:`ReadOnlyView` into a declarative class and give it the
+selectable that defines the view::
+
+    class UserTotals(ReadOnlyView, Base):
+        __tablename__ = 'user_totals'
+        __view__ = select(users.c.id, func.sum(orders.c.amount).label('total'))
+        __view_primary_key__ = ['id']
+
+The mapped columns are generated from the selectable, and
+``UserTotals.__create_view__`` holds the matching
+:class:`~sqlalchemy_views.CreateView`.
+"""
+
+from itertools import chain
+
+from sqlalchemy import MetaData, Table, and_, bindparam, event, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from sqlalchemy_views.views import CreateView
+
+
+class ReadOnlyViewError(InvalidRequestError):
+    """Raised when an instance of a view class is flushed."""
+
+
+def _refuse_writes(session, flush_context, instances):
+    for target in chain(session.new, session.deleted, session.dirty):
+        if not isinstance(target, ReadOnlyView):
+            continue
+        # Assigning an attribute its current value leaves nothing to flush.
+        if target in session.dirty and not session.is_modified(target):
+            continue
+        raise ReadOnlyViewError(
+            "%s is mapped to a view and cannot be written"
+            % type(target).__name__)
+
+
+def _view_table(cls, selectable):
+    metadata = cls.__dict__.get('__view_metadata__') or MetaData()
+    table_args = cls.__dict__.get('__table_args__') or {}
+    table = Table(cls.__tablename__, metadata,
+                  schema=table_args.get('schema'))
+    create_view = CreateView(table, selectable, infer_columns=True)
+    return table, create_view
+
+
+class ReadOnlyView(object):
+    """
+    Declarative mixin mapping a class onto a view.
+
+    Subclasses set ``__tablename__`` and ``__view__``, the selectable
+    defining the view. Typed columns are derived from the selectable once,
+    when the class is created. The class may also set:
+
+    ``__view_primary_key__``
+        Names of the columns identifying a row; defaults to all columns.
+    ``__view_metadata__``
+        The ``MetaData`` the view ``Table`` is added to. It defaults to a
+        new ``MetaData``, which keeps the view out of the ``create_all`` of
+        the declarative base.
+
+    Flushing a new, changed or deleted instance raises
+    :class:`ReadOnlyViewError`. This is checked once per flush by a
+    ``before_flush`` listener on ``Session``; assigning an attribute its
+    current value is not a change.
+    """
+
+    __view__ = None
+    __view_primary_key__ = None
+    __view_metadata__ = None
+
+    def __init_subclass__(cls, **kwargs):
+        selectable = cls.__dict__.get('__view__')
+        if selectable is not None:
+            cls.__table__, cls.__create_view__ = _view_table(cls, selectable)
+            primary_key = cls.__view_primary_key__ or cls.__table__.c.keys()
+            mapper_args = dict(cls.__dict__.get('__mapper_args__') or {})
+            mapper_args.setdefault(
+                'primary_key', [cls.__table__.c[name] for name in primary_key])
+            cls.__mapper_args__ = mapper_args
+            cls._view_statements = {}
+            if not event.contains(Session, 'before_flush', _refuse_writes):
+                event.listen(Session, 'before_flush', _refuse_writes)
+        super(ReadOnlyView, cls).__init_subclass__(**kwargs)
+
+    @classmethod
+    def _view_statement(cls, shape, build):
+        try:
+            return cls._view_statements[shape]
+        except KeyError:
+            statement = cls._view_statements[shape] = build()
+            return statement
+
+    @classmethod
+    def view_select(cls):
+        """
+        Returns ``select(cls)``, built once per class.
+
+        Reusing the same statement object lets SQLAlchemy reuse its
+        memoized cache key and compiled form on every execution.
+        """
+        return cls._view_statement('all', lambda: select(cls))
+
+    @classmethod
+    def view_select_by_key(cls):
+        """
+        Returns a statement selecting one row by primary key, built once
+        per class. Pass the key values as parameters named after the
+        primary key columns::
+
+            session.execute(UserTotals.view_select_by_key(), {'id': 5})
+        """
+        def build():
+            columns = cls.__mapper__.primary_key
+            return select(cls).where(and_(
+                *[column == bindparam(column.key) for column in columns]))
+        return cls._view_statement('by_key', build)
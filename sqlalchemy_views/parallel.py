@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Compile large collections of view DDL across a process pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.engine import Dialect
+from sqlalchemy.engine.url import make_url
+
+
+def _load_dialect(name):
+    if name is None:
+        return None
+    return make_url('%s://' % name).get_dialect()()
+
+
+def _compile_chunk(args):
+    dialect_name, elements = args
+    dialect = _load_dialect(dialect_name)
+    return [str(element.compile(dialect=dialect)) for element in elements]
+
+
+def _chunks(elements, chunksize):
+    for start in range(0, len(elements), chunksize):
+        yield elements[start:start + chunksize]
+
+
+def compile_views(elements, dialect=None, processes=None, chunksize=64):
+    """
+    Compiles view DDL constructs to strings using a pool of processes.
+
+    Parameters
+    ----------
+    elements: iterable
+        ``CreateView``, ``DropView`` or any other DDL construct. Each one is
+        pickled and sent to a worker, so a ``CreateView`` must be built from
+        a SQLAlchemy selectable rather than an already ``Compiled`` object.
+    dialect: str or sqlalchemy.engine.Dialect
+        The dialect to compile for. Dialect instances are recreated in the
+        workers from their name (e.g. ``'postgresql'``), so driver-specific
+        settings on the instance are not carried over. When omitted, the
+        generic string compiler is used, as with ``str(element)``.
+    processes: int
+        Number of worker processes; defaults to the number of CPUs.
+        With ``processes=1`` everything is compiled in the calling process.
+    chunksize: int
+        Number of elements sent to a worker at a time.
+
+    Returns
+    -------
+    list of str
+        The compiled statements, in the same order as ``elements``.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+    if isinstance(dialect, Dialect):
+        dialect = dialect.name
+    elements = list(elements)
+    tasks = [(dialect, chunk) for chunk in _chunks(elements, chunksize)]
+
+    if processes == 1 or len(tasks) <= 1:
+        results = map(_compile_chunk, tasks)
+        return [text for chunk in results for text in chunk]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(_compile_chunk, tasks)
+        return [text for chunk in results for text in chunk]
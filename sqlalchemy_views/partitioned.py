@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Emulate a partitioned materialized view.
+
+A :class:`PartitionedView` splits the rows of a selectable by ranges of a
+key into one materialized view per partition, and puts a plain
+``UNION ALL`` view over them. Refreshing a partition only recomputes the
+rows in its range.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import MetaData, Table, and_, select, union_all
+
+from sqlalchemy_views.views import (
+    CreateView, DropView, RefreshMaterializedView)
+
+
+class Partition(namedtuple('Partition', ['name', 'lower', 'upper'])):
+    """
+    A range of the partition key.
+
+    Parameters
+    ----------
+    name: str
+        Suffix appended to the view name to name the partition.
+    lower: object
+        Inclusive lower bound, or None for no lower bound.
+    upper: object
+        Exclusive upper bound, or None for no upper bound.
+    """
+
+    __slots__ = ()
+
+    def contains(self, value):
+        return ((self.lower is None or self.lower <= value)
+                and (self.upper is None or value < self.upper))
+
+
+def _check_ranges(partitions):
+    for p in partitions:
+        if p.lower is not None and p.upper is not None \
+                and not p.lower < p.upper:
+            raise ValueError("Partition %s has an empty range" % p.name)
+    ordered = sorted(partitions,
+                     key=lambda p: (p.lower is not None, p.lower))
+    for previous, partition in zip(ordered, ordered[1:]):
+        if (previous.upper is None or partition.lower is None
+                or partition.lower < previous.upper):
+            raise ValueError("Partitions %s and %s overlap"
+                             % (previous.name, partition.name))
+
+
+class PartitionedView(object):
+    """
+    A logical view made of one materialized view per partition.
+
+    Parameters
+    ----------
+    element: sqlalchemy.Table
+        The logical view. Queries go against this ``UNION ALL`` view.
+    selectable: sqlalchemy.sql.Select
+        A query that evaluates to a table; each partition adds a filter on
+        ``key`` to it. Its columns must be labeled, as they are used to
+        name the columns of the partitions.
+    key: sqlalchemy.sql.ColumnElement
+        The expression the partitions are ranges of, e.g. a date column.
+    partitions: iterable of Partition or tuple
+        The ``(name, lower, upper)`` ranges. They must not overlap, or a
+        ValueError is raised, as overlapping rows would appear twice in the
+        view.
+    """
+
+    def __init__(self, element, selectable, key, partitions):
+        self.element = element
+        self.selectable = selectable
+        self.key = key
+        self.partitions = [Partition(*p) for p in partitions]
+        names = [p.name for p in self.partitions]
+        if len(set(names)) != len(names):
+            raise ValueError("Partition names must be unique")
+        _check_ranges(self.partitions)
+
+        self._metadata = MetaData()
+        self.tables = dict(
+            (p.name, Table('%s_%s' % (element.name, p.name), self._metadata,
+                           schema=element.schema))
+            for p in self.partitions)
+        self._create_partitions = [
+            CreateView(self.tables[p.name], self.partition_selectable(p),
+                       infer_columns=True, materialized=True)
+            for p in self.partitions]
+
+    def partition_selectable(self, partition):
+        """Returns the selectable restricted to the range of a partition."""
+        criteria = []
+        if partition.lower is not None:
+            criteria.append(self.key >= partition.lower)
+        if partition.upper is not None:
+            criteria.append(self.key < partition.upper)
+        if not criteria:
+            return self.selectable
+        return self.selectable.where(and_(*criteria))
+
+    def partition_for(self, value):
+        """Returns the partition holding rows with key ``value``."""
+        for partition in self.partitions:
+            if partition.contains(value):
+                return partition
+        raise KeyError("No partition holds %r" % (value,))
+
+    def create(self):
+        """
+        Returns the statements creating the partitions and the view over
+        them, in execution order.
+        """
+        union = union_all(*[select(self.tables[p.name])
+                            for p in self.partitions])
+        return self._create_partitions + [CreateView(self.element, union)]
+
+    def drop(self, if_exists=False):
+        """
+        Returns the statements dropping the view and its partitions, in
+        execution order.
+        """
+        return [DropView(self.element, if_exists=if_exists)] + [
+            DropView(self.tables[p.name], if_exists=if_exists,
+                     materialized=True)
+            for p in self.partitions]
+
+    def refresh(self, name=None, value=None, concurrently=False):
+        """
+        Returns the statement refreshing a single partition.
+
+        Parameters
+        ----------
+        name: str
+            The name of the partition to refresh.
+        value: object
+            Alternatively, a key value of the changed rows; the partition
+            holding it is refreshed.
+        concurrently: boolean
+            Refresh without locking out concurrent reads of the partition.
+        """
+        if name is None:
+            if value is None:
+                raise ValueError("Either a partition name or value is needed")
+            name = self.partition_for(value).name
+        return RefreshMaterializedView(self.tables[name],
+                                       concurrently=concurrently)
+
+    def refresh_all(self, concurrently=False):
+        """Returns the statements refreshing every partition."""
+        return [self.refresh(p.name, concurrently=concurrently)
+                for p in self.partitions]
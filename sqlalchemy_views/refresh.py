@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Run materialized view refreshes with timeouts, progress and cancellation.
+
+A :class:`RefreshRunner` executes each refresh on its own connection and
+transaction, watches it from a second connection, and retries refreshes
+that fail to acquire their locks in time.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from sqlalchemy_views.locks import (
+    backoff_delay, is_lock_timeout, reset_timeouts, set_timeouts)
+from sqlalchemy_views.views import RefreshMaterializedView
+
+
+class RefreshProgress(namedtuple('RefreshProgress',
+                                 ['name', 'attempt', 'elapsed',
+                                  'state', 'wait_event'])):
+    """
+    A progress report for a running refresh.
+
+    ``state`` and ``wait_event`` come from ``pg_stat_activity`` on
+    PostgreSQL and are None elsewhere.
+    """
+
+    __slots__ = ()
+
+
+class RefreshResult(namedtuple('RefreshResult',
+                               ['name', 'attempts', 'seconds',
+                                'cancelled', 'error'])):
+    """
+    The outcome of a refresh.
+
+    ``seconds`` is the total duration including retries, and ``error`` is
+    the exception of the last attempt if the refresh did not succeed.
+    ``cancelled`` is True only if :meth:`RefreshRunner.cancel` stopped the
+    refresh, not if it finished before the cancellation.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class RefreshCancelled(Exception):
+    """Raised inside a refresh cancelled before it started."""
+
+
+_PG_ACTIVITY = text(
+    "SELECT state, wait_event FROM pg_stat_activity WHERE pid = :pid")
+
+
+class RefreshRunner(object):
+    """
+    Refreshes materialized views.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        The database to refresh views in.
+    statement_timeout: float
+        Seconds a refresh may run before it is aborted (PostgreSQL).
+    lock_timeout: float
+        Seconds a refresh may wait for its locks before the attempt fails.
+    retries: int
+        Number of times a refresh is retried after a lock timeout.
+    backoff: float
+        Base delay in seconds of the jittered exponential backoff between
+        retries.
+    max_backoff: float
+        Upper bound of the delay between retries.
+    progress: callable
+        Called with a :class:`RefreshProgress` every ``poll_interval``
+        seconds while a refresh runs.
+    poll_interval: float
+        Seconds between progress reports and cancellation checks.
+    """
+
+    def __init__(self, engine, statement_timeout=None, lock_timeout=None,
+                 retries=3, backoff=0.5, max_backoff=30.0, progress=None,
+                 poll_interval=1.0):
+        self.engine = engine
+        self.statement_timeout = statement_timeout
+        self.lock_timeout = lock_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.progress = progress
+        self.poll_interval = poll_interval
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Cancels the running :meth:`refresh` or :meth:`refresh_all` call,
+        including the refreshes it has not started yet. The next call
+        starts uncancelled.
+
+        Safe to call from another thread or a signal handler; the running
+        statement is cancelled by the polling loop of :meth:`refresh`.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def refresh(self, element, concurrently=False):
+        """
+        Refreshes a materialized view.
+
+        Parameters
+        ----------
+        element: sqlalchemy.Table or executable
+            The materialized view, or any statement to run in its place.
+        concurrently: boolean
+            Refresh without locking out concurrent reads of the view.
+
+        Returns
+        -------
+        RefreshResult
+        """
+        self._cancelled.clear()
+        return self._refresh(element, concurrently)
+
+    def _refresh(self, element, concurrently):
+        if hasattr(element, 'fullname'):
+            name = element.fullname
+            statement = RefreshMaterializedView(element,
+                                                concurrently=concurrently)
+        else:
+            name = str(element)
+            statement = element
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            error, cancelled = self._attempt(name, statement, attempt)
+            attempt += 1
+            retry = (error is not None and not cancelled
+                     and attempt <= self.retries and is_lock_timeout(error))
+            if retry and self.cancelled:
+                # Cancelled while waiting to retry.
+                retry, cancelled = False, True
+            if not retry:
+                return RefreshResult(name, attempt, time.monotonic() - start,
+                                     cancelled, error)
+            self._cancelled.wait(
+                backoff_delay(attempt - 1, self.backoff, self.max_backoff))
+
+    def refresh_all(self, elements, concurrently=False):
+        """
+        Refreshes views one after the other, stopping once cancelled.
+
+        Returns
+        -------
+        list of RefreshResult
+        """
+        self._cancelled.clear()
+        results = []
+        for element in elements:
+            if self.cancelled:
+                break
+            results.append(self._refresh(element, concurrently))
+        return results
+
+    def _attempt(self, name, statement, attempt):
+        outcome = {}
+        started = threading.Event()
+
+        def run():
+            try:
+                with self.engine.connect() as conn:
+                    outcome['dbapi_connection'] = conn.connection
+                    try:
+                        # The pid is read in the transaction of the refresh,
+                        # as the query would otherwise begin one of its own.
+                        with conn.begin():
+                            if conn.dialect.name == 'postgresql':
+                                outcome['pid'] = conn.execute(
+                                    text("SELECT pg_backend_pid()")).scalar()
+                            started.set()
+                            if self.cancelled:
+                                raise RefreshCancelled(name)
+                            set_timeouts(conn, self.statement_timeout,
+                                         self.lock_timeout)
+                            conn.execute(statement)
+                    finally:
+                        reset_timeouts(conn)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                started.set()
+
+        worker = threading.Thread(target=run, name='refresh %s' % name)
+        worker.daemon = True
+        start = time.monotonic()
+        worker.start()
+        started.wait()
+        cancel_sent = False
+        while worker.is_alive():
+            worker.join(self.poll_interval)
+            if not worker.is_alive():
+                break
+            if self.cancelled and not cancel_sent:
+                self._cancel_statement(outcome)
+                cancel_sent = True
+            if self.progress is not None:
+                state, wait_event = self._activity(outcome.get('pid'))
+                self.progress(RefreshProgress(
+                    name, attempt, time.monotonic() - start,
+                    state, wait_event))
+        error = outcome.get('error')
+        return error, cancel_sent or isinstance(error, RefreshCancelled)
+
+    def _activity(self, pid):
+        if pid is None:
+            return None, None
+        with self.engine.connect() as conn:
+            row = conn.execute(_PG_ACTIVITY, {'pid': pid}).first()
+        return (row[0], row[1]) if row is not None else (None, None)
+
+    def _cancel_statement(self, outcome):
+        pid = outcome.get('pid')
+        if pid is not None:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT pg_cancel_backend(:pid)"),
+                             {'pid': pid})
+            return
+        interrupt = getattr(outcome.get('dbapi_connection'), 'interrupt',
+                            None)
+        if interrupt is not None:
+            # sqlite3 connections can be interrupted from another thread.
+            interrupt()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Route reads to a materialized view while it is fresh enough.
+
+A :class:`FreshnessRoutedView` pairs a materialized view with the
+selectable defining it and a staleness budget. Refreshes are recorded in a
+small log table, and :meth:`FreshnessRoutedView.routed` returns a
+selectable reading the materialized view while its last refresh is within
+the budget, and the live selectable otherwise::
+
+    SELECT ... FROM mv WHERE EXISTS (<fresh refresh logged>)
+    UNION ALL
+    SELECT ... FROM (<selectable>) WHERE NOT EXISTS (<fresh refresh logged>)
+
+The freshness test does not depend on the rows, so databases such as
+PostgreSQL evaluate it once per query and skip the branch that is not
+needed.
+"""
+
+import datetime
+
+from sqlalchemy import (
+    Column, DateTime, MetaData, String, Table, bindparam, delete, exists,
+    insert, not_, select, union_all)
+
+from sqlalchemy_views.views import CreateView, RefreshMaterializedView
+
+
+def refresh_log_table(metadata=None, name='view_refresh_log', schema=None):
+    """
+    Returns the table recording when each view was last refreshed.
+
+    Create it like any other table, e.g. with ``metadata.create_all()``.
+    """
+    return Table(name, metadata if metadata is not None else MetaData(),
+                 Column('view_name', String(255), primary_key=True),
+                 Column('refreshed_at', DateTime(), nullable=False),
+                 schema=schema)
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class FreshnessRoutedView(object):
+    """
+    A materialized view read only while it is fresh enough.
+
+    Parameters
+    ----------
+    element: sqlalchemy.Table
+        The materialized view. Columns are inferred from ``selectable``
+        when it has none; otherwise they must be named like the columns of
+        ``selectable``, in the same order, as the two are unioned.
+    selectable: sqlalchemy.Selectable
+        The query defining the materialized view.
+    max_staleness: datetime.timedelta
+        How long after a refresh the materialized view may be read.
+    log_table: sqlalchemy.Table
+        The table recording refreshes; see :func:`refresh_log_table`.
+    clock: callable
+        Returns the current time as a naive UTC datetime.
+
+    Raises
+    ------
+    ValueError
+        If the columns of ``element`` are not named like the columns of
+        ``selectable``.
+    """
+
+    def __init__(self, element, selectable, max_staleness, log_table=None,
+                 clock=_utcnow):
+        self.element = element
+        self.selectable = selectable
+        self.max_staleness = max_staleness
+        self.log_table = (log_table if log_table is not None
+                          else refresh_log_table())
+        self.clock = clock
+        self.create_view = CreateView(element, selectable, materialized=True,
+                                      infer_columns=True)
+        names = element.c.keys()
+        selected = selectable.subquery().c.keys()
+        if names != selected:
+            raise ValueError(
+                "Columns of view %s (%s) do not match its selectable (%s)"
+                % (element.name, ', '.join(names), ', '.join(selected)))
+
+    def _cutoff(self):
+        return self.clock() - self.max_staleness
+
+    def is_fresh(self):
+        """
+        Returns the SQL condition that the view was refreshed within the
+        staleness budget. The budget is evaluated when the statement is
+        executed, so statements built from it can be reused.
+        """
+        log = self.log_table
+        cutoff = bindparam('%s_fresh_after' % self.element.name,
+                           callable_=self._cutoff, type_=DateTime())
+        return exists().where(log.c.view_name == self.element.fullname,
+                              log.c.refreshed_at >= cutoff)
+
+    def routed(self, name=None):
+        """
+        Returns a subquery reading the materialized view when it is fresh
+        and the live selectable when it is not.
+        """
+        fresh = self.is_fresh()
+        live = self.selectable.subquery()
+        return union_all(
+            select(*self.element.columns).where(fresh),
+            select(*[live.c[column.key] for column in self.element.columns])
+            .where(not_(fresh)),
+        ).subquery(name or self.element.name)
+
+    def mark_refreshed(self, connection, refreshed_at=None):
+        """Records a refresh of the view, now or at ``refreshed_at``."""
+        log = self.log_table
+        name = self.element.fullname
+        connection.execute(delete(log).where(log.c.view_name == name))
+        connection.execute(insert(log).values(
+            view_name=name,
+            refreshed_at=refreshed_at if refreshed_at is not None
+            else self.clock()))
+
+    def refresh(self, connection, concurrently=False):
+        """
+        Refreshes the materialized view and records the refresh, in the
+        transaction of ``connection``. The refresh is recorded at the time
+        it started, as later changes to the base tables are not included.
+        """
+        started = self.clock()
+        connection.execute(RefreshMaterializedView(
+            self.element, concurrently=concurrently))
+        self.mark_refreshed(connection, started)
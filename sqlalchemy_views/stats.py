@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Collect view usage statistics from the database catalog.
+
+The numbers come from the statistics the database already keeps:
+``pg_stat_user_tables`` for PostgreSQL materialized views,
+``pg_stat_statements`` for plain PostgreSQL views (when the extension is
+installed) and ``performance_schema`` statement digests for MySQL.
+"""
+
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+
+class ViewUsage(namedtuple('ViewUsage',
+                           ['schema', 'name', 'materialized',
+                            'scans', 'rows'])):
+    """
+    Usage counters for a single view.
+
+    Parameters
+    ----------
+    schema: str
+        Schema containing the view.
+    name: str
+        Name of the view.
+    materialized: boolean
+        Whether the view is a materialized view.
+    scans: int
+        Number of times the view was read.
+    rows: int
+        Number of rows read from the view.
+    """
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return (self.schema, self.name)
+
+
+_PG_MATVIEWS = text("""
+SELECT s.schemaname, s.relname, TRUE,
+       COALESCE(s.seq_scan, 0) + COALESCE(s.idx_scan, 0),
+       COALESCE(s.seq_tup_read, 0) + COALESCE(s.idx_tup_fetch, 0)
+FROM pg_stat_user_tables s
+JOIN pg_matviews m
+  ON m.schemaname = s.schemaname AND m.matviewname = s.relname
+""")
+
+# pg_stat_statements covers the whole cluster, so statements are limited to
+# the current database. A statement uses a view if it names it qualified
+# with its schema, or unqualified for views in the current schema. The
+# names are escaped before they are put into the regular expression.
+_PG_VIEWS = text(r"""
+WITH views AS (
+    SELECT v.schemaname, v.viewname,
+           regexp_replace(v.schemaname, '(\W)', '\\\1', 'g') AS schema_re,
+           regexp_replace(v.viewname, '(\W)', '\\\1', 'g') AS view_re,
+           v.schemaname = current_schema() AS unqualified
+    FROM pg_views v
+    WHERE v.schemaname NOT IN ('pg_catalog', 'information_schema')
+)
+SELECT v.schemaname, v.viewname, FALSE,
+       COALESCE(SUM(s.calls), 0), COALESCE(SUM(s.rows), 0)
+FROM views v
+LEFT JOIN pg_stat_statements s
+  ON s.dbid = (SELECT oid FROM pg_database
+               WHERE datname = current_database())
+  AND s.query ~* ('(^|[^\w."])((' || v.schema_re || '|"' || v.schema_re
+                  || '")\.)' || CASE WHEN v.unqualified THEN '?' ELSE '' END
+                  || '(' || v.view_re || '|"' || v.view_re || '")($|[^\w"])')
+GROUP BY v.schemaname, v.viewname
+""")
+
+_PG_VIEWS_WITHOUT_STATEMENTS = text("""
+SELECT v.schemaname, v.viewname, FALSE, 0, 0
+FROM pg_views v
+WHERE v.schemaname NOT IN ('pg_catalog', 'information_schema')
+""")
+
+_PG_HAS_STATEMENTS = text(
+    "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+
+_MYSQL_VIEWS = text("""
+SELECT v.TABLE_SCHEMA, v.TABLE_NAME, FALSE,
+       COALESCE(SUM(d.COUNT_STAR), 0), COALESCE(SUM(d.SUM_ROWS_SENT), 0)
+FROM information_schema.VIEWS v
+LEFT JOIN performance_schema.events_statements_summary_by_digest d
+  ON d.SCHEMA_NAME = v.TABLE_SCHEMA
+  AND d.DIGEST_TEXT LIKE CONCAT('%`', v.TABLE_NAME, '`%')
+WHERE v.TABLE_SCHEMA NOT IN ('sys', 'mysql', 'performance_schema',
+                             'information_schema')
+GROUP BY v.TABLE_SCHEMA, v.TABLE_NAME
+""")
+
+
+def _collect_postgresql(connection):
+    queries = [_PG_MATVIEWS]
+    if connection.execute(_PG_HAS_STATEMENTS).first() is not None:
+        queries.append(_PG_VIEWS)
+    else:
+        queries.append(_PG_VIEWS_WITHOUT_STATEMENTS)
+    for query in queries:
+        for row in connection.execute(query):
+            yield ViewUsage(row[0], row[1], bool(row[2]),
+                            int(row[3]), int(row[4]))
+
+
+def _collect_mysql(connection):
+    for row in connection.execute(_MYSQL_VIEWS):
+        yield ViewUsage(row[0], row[1], bool(row[2]),
+                        int(row[3]), int(row[4]))
+
+
+_COLLECTORS = {
+    'postgresql': _collect_postgresql,
+    'mysql': _collect_mysql,
+    'mariadb': _collect_mysql,
+}
+
+
+class UsageSnapshot(object):
+    """
+    Usage counters for every view in the database at a point in time.
+
+    The counters kept by the database are cumulative; subtract an earlier
+    snapshot with :meth:`delta` to get the usage over an interval.
+
+    Parameters
+    ----------
+    usage: iterable of ViewUsage
+        The counters for each view.
+    taken_at: float
+        Unix timestamp of the snapshot.
+    """
+
+    def __init__(self, usage, taken_at=None):
+        self.usage = dict((u.key, u) for u in usage)
+        self.taken_at = time.time() if taken_at is None else taken_at
+
+    def delta(self, earlier):
+        """
+        Returns a snapshot of the usage since ``earlier``.
+
+        Views missing from ``earlier`` are treated as unused at that time.
+        Counters that went down (e.g. after a statistics reset) are
+        reported from zero.
+        """
+        usage = []
+        for key, current in self.usage.items():
+            previous = earlier.usage.get(key)
+            if previous is None or current.scans < previous.scans:
+                usage.append(current)
+                continue
+            usage.append(current._replace(
+                scans=current.scans - previous.scans,
+                rows=max(current.rows - previous.rows, 0)))
+        return UsageSnapshot(usage, taken_at=self.taken_at)
+
+    def report(self, hot_scans=1000, dead_scans=0):
+        """
+        Classifies the views of this snapshot.
+
+        Parameters
+        ----------
+        hot_scans: int
+            Plain views read at least this many times are reported as
+            candidates for materialization.
+        dead_scans: int
+            Views read at most this many times are reported as candidates
+            for dropping.
+
+        Returns
+        -------
+        UsageReport
+        """
+        ordered = sorted(self.usage.values(),
+                         key=lambda u: (-u.scans, u.schema or '', u.name))
+        hot = [u for u in ordered
+               if not u.materialized and u.scans >= hot_scans]
+        dead = [u for u in reversed(ordered) if u.scans <= dead_scans]
+        return UsageReport(hot, dead, ordered)
+
+
+class UsageReport(namedtuple('UsageReport', ['hot', 'dead', 'views'])):
+    """
+    Hot and dead views found in a :class:`UsageSnapshot`.
+
+    ``hot`` holds plain views worth materializing, busiest first,
+    ``dead`` holds views that are not read, and ``views`` holds every view.
+    """
+
+    __slots__ = ()
+
+    def as_dict(self):
+        """Returns the report as plain lists of ``schema.name`` strings."""
+        def names(usage):
+            return ['.'.join(filter(None, u.key)) for u in usage]
+        return {
+            'hot': names(self.hot),
+            'dead': names(self.dead),
+            'views': [dict(u._asdict()) for u in self.views],
+        }
+
+
+def take_snapshot(connection):
+    """
+    Reads the usage counters of all views from the catalog.
+
+    Parameters
+    ----------
+    connection: sqlalchemy.engine.Connection
+        Connection to a PostgreSQL or MySQL database.
+
+    Returns
+    -------
+    UsageSnapshot
+    """
+    name = connection.dialect.name
+    try:
+        collector = _COLLECTORS[name]
+    except KeyError:
+        raise NotImplementedError(
+            "View usage statistics are not available for %s" % name)
+    return UsageSnapshot(collector(connection))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Compile view DDL once and render it for many schemas.
+
+Multi-tenant deployments create the same views in many schemas with a
+``schema_translate_map``. A :class:`SchemaTemplate` compiles a statement
+once with placeholders in place of the schema names, and renders it for
+each tenant by substituting the schema names only.
+"""
+
+import copy
+import re
+
+from sqlalchemy import Column, MetaData, Table
+from sqlalchemy.engine import Compiled
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.expression import ColumnClause, TableClause
+
+# SQLAlchemy renders a schema named in the schema_translate_map of a
+# compilation as this token, followed by the "." qualifying the name.
+_SCHEMA_TOKEN = re.compile(r'__\[SCHEMA_([^\]]+)\]\.')
+
+
+def _schemas(element):
+    schemas = set()
+    for obj in [element.element] + list(
+            visitors.iterate(getattr(element, 'selectable', None))):
+        if isinstance(obj, TableClause):
+            schemas.add(getattr(obj, 'schema', None))
+    return schemas
+
+
+def _with_tables(selectable):
+    """
+    Replaces lightweight ``sa.table()`` objects with equivalent ``Table``
+    objects, as SQLAlchemy applies a ``schema_translate_map`` to the
+    latter only.
+    """
+    tables = {}
+
+    def table_for(clause):
+        if clause not in tables:
+            tables[clause] = Table(
+                clause.name, MetaData(),
+                *[Column(column.name, column.type) for column in clause.c],
+                schema=getattr(clause, 'schema', None))
+        return tables[clause]
+
+    def replace(obj):
+        if isinstance(obj, Table):
+            return None
+        if isinstance(obj, TableClause):
+            return table_for(obj)
+        if (isinstance(obj, ColumnClause)
+                and isinstance(obj.table, TableClause)
+                and not isinstance(obj.table, Table)):
+            return table_for(obj.table).c[obj.name]
+        return None
+
+    return visitors.replacement_traverse(selectable, {}, replace)
+
+
+class SchemaTemplate(object):
+    """
+    A DDL statement compiled once, renderable for any schema mapping.
+
+    Parameters
+    ----------
+    element: sqlalchemy.sql.ddl.DDLElement
+        The statement, e.g. a ``CreateView`` or ``DropView``.
+    dialect: sqlalchemy.engine.Dialect
+        The dialect to compile for.
+    schemas: iterable of str
+        The schema names that may be translated, as in the keys of a
+        ``schema_translate_map``; ``None`` stands for unqualified names.
+        Defaults to the schemas of the view and of the tables its
+        selectable reads from, including lightweight ``sa.table()``
+        objects, which are translated as well.
+    """
+
+    def __init__(self, element, dialect=None, schemas=None):
+        selectable = getattr(element, 'selectable', None)
+        if selectable is not None and not isinstance(selectable, Compiled):
+            element = copy.copy(element)
+            element.selectable = _with_tables(selectable)
+        if schemas is None:
+            schemas = _schemas(element)
+        schemas = set(schemas)
+        compiled = element.compile(
+            dialect=dialect,
+            schema_translate_map=dict((s, s) for s in schemas))
+        self.schemas = frozenset(schemas)
+        self.template = str(compiled)
+        self._quote_schema = compiled.preparer.quote_schema
+
+    def render(self, schema_translate_map=None):
+        """
+        Returns the statement with the schemas of ``schema_translate_map``.
+
+        Schemas missing from the mapping keep their original name.
+        """
+        schema_translate_map = schema_translate_map or {}
+
+        def replace(match):
+            name = match.group(1)
+            name = None if name == '_none' else name
+            schema = schema_translate_map.get(name, name)
+            if schema is None:
+                return ''
+            return self._quote_schema(schema) + '.'
+
+        return _SCHEMA_TOKEN.sub(replace, self.template)
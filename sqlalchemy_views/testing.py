@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""A pytest plugin executing view DDL against an in-memory SQLite database.
+
+Enable it in the ``conftest.py`` at the root of a test suite::
+
+    pytest_plugins = ['sqlalchemy_views.testing']
+
+and use the ``view_checker`` fixture::
+
+    def test_views(view_checker):
+        view_checker.assert_views(
+            [create_my_view, create_other_view], metadata=Base.metadata)
+
+Every ``CreateView`` is executed in order, then a sample query is run and
+timed against each view. Clauses SQLite does not support, such as
+``or_replace``, ``materialized``, ``options``, ``secure``,
+``late_binding``, ``cluster_by`` and ``check_option``, are left out, so such
+views are created as plain views.
+"""
+
+import copy
+import time
+from collections import namedtuple
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.pool import StaticPool
+
+
+class ViewCheck(namedtuple('ViewCheck', ['name', 'error', 'seconds'])):
+    """
+    The outcome of checking one view.
+
+    ``error`` is the exception raised while creating or querying the view,
+    or None, and ``seconds`` is the duration of the sample query.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# CreateView attributes rendering clauses SQLite does not support, with the
+# values they are neutralized to.
+_SQLITE_UNSUPPORTED = [
+    ('or_replace', False),
+    ('materialized', False),
+    ('options', None),
+    ('secure', False),
+    ('late_binding', False),
+    ('cluster_by', None),
+    ('check_option', None),
+]
+
+
+def _sqlite_compatible(create_view):
+    unsupported = [(attribute, value)
+                   for attribute, value in _SQLITE_UNSUPPORTED
+                   if getattr(create_view, attribute)]
+    if not unsupported:
+        return create_view
+    create_view = copy.copy(create_view)
+    for attribute, value in unsupported:
+        setattr(create_view, attribute, value)
+    return create_view
+
+
+class ViewChecker(object):
+    """
+    Creates and samples views in a SQLite database.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        A SQLite engine; see :func:`sqlite_engine`.
+    sample_limit: int
+        Number of rows fetched by the sample query of each view.
+    """
+
+    def __init__(self, engine, sample_limit=100):
+        self.engine = engine
+        self.sample_limit = sample_limit
+
+    def check_views(self, create_views, metadata=None):
+        """
+        Creates the views and times a sample query on each.
+
+        Parameters
+        ----------
+        create_views: iterable of CreateView
+            The views to check, in dependency order.
+        metadata: sqlalchemy.MetaData
+            Base tables to create first.
+
+        Returns
+        -------
+        list of ViewCheck
+        """
+        if metadata is not None:
+            metadata.create_all(self.engine)
+        checks = []
+        for create_view in create_views:
+            view = create_view.element
+            sample = select(text('*')).select_from(view).limit(
+                self.sample_limit)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(_sqlite_compatible(create_view))
+                start = time.perf_counter()
+                with self.engine.connect() as conn:
+                    conn.execute(sample).fetchall()
+                seconds = time.perf_counter() - start
+            except Exception as e:
+                checks.append(ViewCheck(view.fullname, e, None))
+            else:
+                checks.append(ViewCheck(view.fullname, None, seconds))
+        return checks
+
+    def assert_views(self, create_views, metadata=None, max_seconds=None):
+        """
+        Like :meth:`check_views`, but raises an AssertionError listing every
+        view that failed or whose sample query took more than
+        ``max_seconds``.
+        """
+        checks = self.check_views(create_views, metadata=metadata)
+        failures = []
+        for check in checks:
+            if not check.ok:
+                failures.append('%s: %s' % (check.name, check.error))
+            elif max_seconds is not None and check.seconds > max_seconds:
+                failures.append('%s: sample query took %.3fs (limit %.3fs)'
+                                % (check.name, check.seconds, max_seconds))
+        if failures:
+            raise AssertionError('\n'.join(['View checks failed:'] + failures))
+        return checks
+
+
+def sqlite_engine():
+    """Returns an engine for a private in-memory SQLite database."""
+    return create_engine('sqlite://', poolclass=StaticPool,
+                         connect_args={'check_same_thread': False})
+
+
+@pytest.fixture
+def view_engine():
+    """An in-memory SQLite engine, discarded after the test."""
+    engine = sqlite_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def view_checker(view_engine):
+    """A :class:`ViewChecker` bound to ``view_engine``."""
+    return ViewChecker(view_engine)
@@ -1,14 +1,54 @@
 # -*- coding: utf-8 -*-
 """The view stuff."""
 
+import inspect
+import re
+import sys
+import warnings
 
-from sqlalchemy.schema import CreateColumn
-from sqlalchemy.sql.ddl import _CreateDropBase
+from sqlalchemy.schema import Column, CreateColumn
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.expression import (
+    Alias, ColumnClause, CompoundSelect, Exists, FunctionElement, Over,
+    ScalarSelect, Select, TableClause, select)
+from sqlalchemy.sql.ddl import DDLElement, _CreateDropBase
+from sqlalchemy.sql.sqltypes import NullType
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.engine import Compiled
 
 
-class CreateView(_CreateDropBase):
+_default = object()
+
+_BASE_PARAMETERS = inspect.signature(_CreateDropBase.__init__).parameters
+
+# The constructor of _CreateDropBase lost its ``on`` parameter in
+# SQLAlchemy 1.4.0 and its ``bind`` parameter in 2.0.0. The matching
+# constructor is picked once here rather than on every construction.
+if 'on' in _BASE_PARAMETERS:
+    def _init_create_drop(self, element, on=None, bind=None):
+        _CreateDropBase.__init__(self, element, on=on, bind=bind)
+elif 'bind' in _BASE_PARAMETERS:
+    def _init_create_drop(self, element, on=None, bind=None):
+        if on is not None:
+            raise TypeError("'on' is not supported on SQLAlchemy 1.4+")
+        _CreateDropBase.__init__(self, element, bind=bind)
+else:
+    def _init_create_drop(self, element, on=None, bind=None):
+        if on is not None:
+            raise TypeError("'on' is not supported on SQLAlchemy 1.4+")
+        if bind is not None:
+            raise TypeError("'bind' is not supported on SQLAlchemy 2.0+")
+        _CreateDropBase.__init__(self, element)
+
+
+class _CreateDropViewBase(_CreateDropBase):
+    """Base of the view constructs, accepting ``on`` and ``bind`` where the
+    installed SQLAlchemy version supports them."""
+
+    __init__ = _init_create_drop
+
+
+class CreateView(_CreateDropViewBase):
     """
     Prepares a CREATE VIEW statement.
 
@@ -27,68 +67,364 @@ class CreateView(_CreateDropBase):
     options: dict
         Specify optional parameters for a view. For Postgresql, it translates
         into 'WITH ( view_option_name [= view_option_value] [, ... ] )'
+    infer_columns: boolean
+        If True, the columns of the view are checked against
+        ``selectable.selected_columns``. A view without columns gets typed
+        columns added from the selectable; otherwise the number of columns
+        and their types must match, or a ValueError is raised.
+    prune_columns: boolean
+        If True, columns of a SELECT that the view does not expose are
+        removed from the SELECT. The view's columns are matched to the
+        selected columns by name.
+    materialized: boolean
+        If True, a materialized view is created.
+    secure: boolean
+        If True, a secure view is created (Snowflake), hiding the view
+        definition from users who only have access to the view.
+    late_binding: boolean
+        If True, the view is not bound to the objects it reads from, by
+        rendering 'WITH NO SCHEMA BINDING' (Redshift). Base tables can then
+        be dropped and recreated without dropping the view.
+    cluster_by: list
+        Column names or expressions to cluster a materialized view by
+        (Snowflake, BigQuery).
+    flatten: list
+        ``CreateView`` definitions of other views. References to these
+        views in the selectable are replaced with their definitions when
+        compiling, so the view reads from the base tables directly.
+    flatten_depth: int
+        How many levels of views within views are expanded.
+    size_warning_threshold: int
+        Length in characters of the compiled selectable above which a
+        :class:`LargeViewDefinitionWarning` is emitted, e.g. for long inline
+        VALUES or IN lists. None disables the check. Defaults to the class
+        attribute of the same name.
+    size_limit_action: str
+        ``'warn'`` to emit a warning above the threshold, or ``'raise'`` to
+        raise a ValueError instead.
+    check_option: str or boolean
+        ``'local'`` or ``'cascaded'`` to render 'WITH LOCAL CHECK OPTION' or
+        'WITH CASCADED CHECK OPTION', or True for 'WITH CHECK OPTION', so
+        rows inserted or updated through the view must satisfy its WHERE
+        clause. A SELECT selectable must then be updatable: reading from a
+        single table or view, without aggregates, window functions,
+        DISTINCT, GROUP BY, HAVING, LIMIT or OFFSET, or a ValueError is
+        raised. Textual selectables are not checked.
     """
 
+    size_warning_threshold = 16 * 1024 * 1024
+
     __visit_name__ = "create_view"
 
     def __init__(self, element, selectable, on=None, bind=None,
-                 or_replace=False, options=None):
-        try:
-            super(CreateView, self).__init__(element, on=on, bind=bind)
-        except TypeError:
-            # Since version 1.4.0 of SQLAlchemy the ** on ** parameter no
-            # longer exists. it causes a ** TypeError ** exception
-            if on is not None:
-                raise TypeError("'on' is not supported on SQLAlchemy 1.4+")
-
-            try:
-                super(CreateView, self).__init__(element, bind=bind)
-            except TypeError:
-                # Since version 2.0.0 of SQLAlchemy the ** bind ** parameter no
-                # longer exists. it causes a ** TypeError ** exception
-                if bind is not None:
-                    raise TypeError(
-                        "'bind' is not supported on SQLAlchemy 2.0+")
-
-                super(CreateView, self).__init__(element)
+                 or_replace=False, options=None, infer_columns=False,
+                 prune_columns=False, materialized=False, secure=False,
+                 late_binding=False, cluster_by=None, flatten=None,
+                 flatten_depth=10, size_warning_threshold=_default,
+                 size_limit_action='warn', check_option=None):
+        super(CreateView, self).__init__(element, on=on, bind=bind)
+
+        if check_option:
+            if not (check_option is True
+                    or check_option in ('local', 'cascaded')):
+                raise ValueError(
+                    "check_option must be 'local', 'cascaded' or True")
+            if materialized:
+                raise ValueError(
+                    "A materialized view cannot have a check option")
+            _check_updatable(element, selectable)
+
+        if prune_columns:
+            selectable = _prune_columns(element, selectable)
+        if infer_columns:
+            _infer_columns(element, selectable)
 
         self.columns = [CreateColumn(column) for column in element.columns]
         self.selectable = selectable
         self.or_replace = or_replace
         self.options = options
+        self.materialized = materialized
+        self.secure = secure
+        self.late_binding = late_binding
+        self.cluster_by = cluster_by
+        self.flatten = list(flatten) if flatten else []
+        self.flatten_depth = flatten_depth
+        if size_warning_threshold is not _default:
+            self.size_warning_threshold = size_warning_threshold
+        if size_limit_action not in ('warn', 'raise'):
+            raise ValueError("size_limit_action must be 'warn' or 'raise'")
+        self.size_limit_action = size_limit_action
+        self.check_option = check_option
+
+
+_AGGREGATES = frozenset([
+    'array_agg', 'avg', 'bit_and', 'bit_or', 'bool_and', 'bool_or', 'count',
+    'every', 'group_concat', 'json_agg', 'jsonb_agg', 'listagg', 'max',
+    'min', 'mode', 'percentile_cont', 'percentile_disc', 'stddev',
+    'string_agg', 'sum', 'variance', 'xmlagg'])
+
+
+def _top_level(column):
+    """Iterates over a column expression without entering subqueries,
+    whose aggregates do not make the view read-only."""
+    stack = [column]
+    while stack:
+        obj = stack.pop()
+        yield obj
+        if not isinstance(obj, (ScalarSelect, Select, Exists)):
+            stack.extend(obj.get_children())
+
+
+def _check_updatable(view, selectable):
+    if isinstance(selectable, CompoundSelect):
+        raise ValueError(
+            "View %s cannot have a check option, a compound select is not "
+            "updatable" % view.name)
+    if not isinstance(selectable, Select):
+        return
+
+    if hasattr(selectable, 'get_final_froms'):
+        froms = selectable.get_final_froms()
+    else:
+        froms = selectable.froms
+    tables = [from_.element if isinstance(from_, Alias) else from_
+              for from_ in froms]
+    problems = []
+    if len(tables) != 1 or not isinstance(tables[0], TableClause):
+        problems.append('it does not read from a single table')
+    if selectable._distinct:
+        problems.append('DISTINCT')
+    if selectable._group_by_clauses:
+        problems.append('GROUP BY')
+    if selectable._having_criteria:
+        problems.append('HAVING')
+    if selectable._limit_clause is not None:
+        problems.append('LIMIT')
+    if selectable._offset_clause is not None:
+        problems.append('OFFSET')
+    for _, column in _selected_columns(selectable):
+        for obj in _top_level(column):
+            if isinstance(obj, Over):
+                problems.append('window function')
+            elif (isinstance(obj, FunctionElement)
+                  and obj.name.lower() in _AGGREGATES):
+                problems.append('aggregate %s()' % obj.name)
+    if problems:
+        raise ValueError(
+            "View %s cannot have a check option, its selectable is not "
+            "updatable: %s" % (view.name, ', '.join(problems)))
+
+
+def _selected_columns(selectable):
+    try:
+        return list(selectable.selected_columns.items())
+    except AttributeError:
+        raise ValueError(
+            "Cannot determine the columns of %r" % type(selectable).__name__)
+
+
+def _is_labeled(key):
+    return key != '_no_label' and not key.startswith('%(')
+
+
+def _prune_columns(view, selectable):
+    if not hasattr(selectable, 'with_only_columns'):
+        raise ValueError("Only a SELECT can have its columns pruned")
+    if not len(view.columns):
+        raise ValueError("Pruning requires the view to declare its columns")
+    selected = dict(_selected_columns(selectable))
+    try:
+        kept = [selected[column.name] for column in view.columns]
+    except KeyError as e:
+        raise ValueError("Column %s is not selected by the view" % e)
+    return selectable.with_only_columns(*kept)
+
+
+def _infer_columns(view, selectable):
+    selected = _selected_columns(selectable)
+    if not len(view.columns):
+        for key, column in selected:
+            if not _is_labeled(key):
+                raise ValueError(
+                    "Cannot infer the name of unlabeled column %s" % column)
+            view.append_column(Column(key, column.type))
+        return
+
+    if len(view.columns) != len(selected):
+        raise ValueError(
+            "View %s has %d columns but its selectable has %d"
+            % (view.name, len(view.columns), len(selected)))
+    for view_column, (key, column) in zip(view.columns, selected):
+        if isinstance(view_column.type, NullType):
+            view_column.type = column.type
+        elif isinstance(column.type, NullType):
+            continue
+        elif (view_column.type._type_affinity
+              is not column.type._type_affinity):
+            raise ValueError(
+                "Column %s of view %s is %s but the selectable gives %s"
+                % (view_column.name, view.name,
+                   view_column.type, column.type))
+
+
+class LargeViewDefinitionWarning(UserWarning):
+    """Emitted when the compiled selectable of a view exceeds
+    :attr:`CreateView.size_warning_threshold`."""
+
+
+_INTERNAL_MODULE = re.compile(r'^sqlalchemy(?:_views)?(?:\.|$)')
+
+
+def _warn(message, category):
+    # Point the warning at the code compiling the view rather than at the
+    # SQLAlchemy compiler calling into this module.
+    frame = sys._getframe(0)
+    stacklevel = 1
+    while frame is not None and _INTERNAL_MODULE.match(
+            frame.f_globals.get('__name__', '')):
+        frame = frame.f_back
+        stacklevel += 1
+    warnings.warn(message, category, stacklevel=stacklevel)
+
+
+def _check_size(create, view, compiled_selectable):
+    threshold = create.size_warning_threshold
+    if threshold is None or len(compiled_selectable) <= threshold:
+        return
+    if create.size_limit_action == 'raise':
+        raise ValueError(
+            "The definition of view %s is %d characters long, more than %d"
+            % (view.name, len(compiled_selectable), threshold))
+    _warn("The definition of view %s is %d characters long; consider "
+          "moving inline literals to a table" % (
+              view.name, len(compiled_selectable)),
+          LargeViewDefinitionWarning)
+
+
+def _inlined_view(create_view):
+    view = create_view.element
+    selectable = create_view.selectable
+    selected = _selected_columns(selectable)
+    names = view.columns.keys()
+    if names and len(names) != len(selected):
+        raise ValueError(
+            "View %s has %d columns but its selectable has %d"
+            % (view.name, len(names), len(selected)))
+    if names and names != [key for key, column in selected]:
+        # Rename the selected columns to the columns of the view
+        if hasattr(selectable, 'with_only_columns'):
+            selectable = selectable.with_only_columns(*[
+                column.label(name)
+                for (key, column), name in zip(selected, names)])
+        else:
+            inner = selectable.subquery()
+            selectable = select(*[
+                column.label(name) for column, name in zip(inner.c, names)])
+    definition = selectable.subquery(view.name)
+    return definition, dict((c.name, c) for c in definition.c)
+
+
+def _flatten(selectable, definitions, depth):
+    """
+    Replaces the views of ``definitions`` referenced by ``selectable``
+    with subqueries of their definitions, up to ``depth`` levels deep.
+    """
+    definitions = dict(
+        ((d.element.schema, d.element.name), d) for d in definitions
+        if hasattr(d.selectable, 'subquery'))
+    inlined = {}
+
+    def lookup(table):
+        key = (table.schema, table.name)
+        if key not in definitions:
+            return None
+        if key not in inlined:
+            inlined[key] = _inlined_view(definitions[key])
+        return inlined[key]
+
+    def replace(obj):
+        if isinstance(obj, TableClause):
+            found = lookup(obj)
+            return found[0] if found is not None else None
+        if isinstance(obj, ColumnClause) and isinstance(obj.table,
+                                                        TableClause):
+            found = lookup(obj.table)
+            if found is not None:
+                return found[1][obj.name]
+        return None
+
+    for _ in range(depth):
+        inlined.clear()
+        selectable = visitors.replacement_traverse(selectable, {}, replace)
+        if not inlined:
+            break
+    return selectable
+
+
+def _compile_selectable(create, sql_compiler):
+    """
+    Returns the SELECT of a ``CreateView`` as it is rendered after ``AS``:
+    the string of a precompiled selectable, otherwise the selectable,
+    flattened if asked, compiled with literal binds.
+    """
+    selectable = create.selectable
+    if isinstance(selectable, Compiled):
+        return selectable.string
+    if create.flatten:
+        selectable = _flatten(selectable, create.flatten, create.flatten_depth)
+    return sql_compiler.process(selectable, literal_binds=True)
 
 
 @compiles(CreateView)
 def visit_create_view(create, compiler, **kw):
     view = create.element
     preparer = compiler.preparer
-    text = "\nCREATE "
+    # The parts are joined once at the end, so a large selectable is
+    # copied into the statement only once.
+    parts = ["\nCREATE "]
     if create.or_replace:
-        text += "OR REPLACE "
-    text += "VIEW %s " % preparer.format_table(view)
+        parts.append("OR REPLACE ")
+    if create.secure:
+        parts.append("SECURE ")
+    if create.materialized:
+        parts.append("MATERIALIZED ")
+    parts.append("VIEW %s " % preparer.format_table(view))
     if create.columns:
         column_names = [preparer.format_column(col.element)
                         for col in create.columns]
-        text += "("
-        text += ', '.join(column_names)
-        text += ") "
+        parts.append("(%s) " % ', '.join(column_names))
     if create.options:
         ops = []
         for opname, opval in create.options.items():
             ops.append('='.join([str(opname), str(opval)]))
 
-        text += 'WITH (%s) ' % (', '.join(ops))
+        parts.append('WITH (%s) ' % (', '.join(ops)))
+    if create.cluster_by:
+        keys = ', '.join(
+            preparer.quote(key) if isinstance(key, str)
+            else compiler.sql_compiler.process(
+                key, literal_binds=True, include_table=False)
+            for key in create.cluster_by)
+        if compiler.dialect.name == 'bigquery':
+            parts.append('CLUSTER BY %s ' % keys)
+        else:
+            parts.append('CLUSTER BY (%s) ' % keys)
 
-    compiled_selectable = (
-        create.selectable
-        if isinstance(create.selectable, Compiled)
-        else compiler.sql_compiler.process(create.selectable, literal_binds=True)
-    )
-    text += "AS %s\n\n" % compiled_selectable
-    return text
+    compiled_selectable = _compile_selectable(create, compiler.sql_compiler)
+    _check_size(create, view, compiled_selectable)
+    parts.append("AS ")
+    parts.append(compiled_selectable)
+    if create.check_option is True:
+        parts.append(" WITH CHECK OPTION")
+    elif create.check_option:
+        parts.append(" WITH %s CHECK OPTION" % create.check_option.upper())
+    if create.late_binding:
+        parts.append(" WITH NO SCHEMA BINDING")
+    parts.append("\n\n")
+    return ''.join(parts)
 
 
-class DropView(_CreateDropBase):
+class DropView(_CreateDropViewBase):
     """
     Prepares a DROP VIEW statement.
 
@@ -103,41 +439,129 @@ class DropView(_CreateDropBase):
     if_exists: boolean
         Do nothing if the view does not exist.
         An exception will be raised for nonexistent views if not set.
+    materialized: boolean
+        If True, a materialized view is dropped.
     """
 
     __visit_name__ = "drop_view"
 
     def __init__(self, element, on=None, bind=None,
-                 cascade=False, if_exists=False):
-        try:
-            super(DropView, self).__init__(element, on=on, bind=bind)
-        except TypeError:
-            # Since version 1.4.0 of SQLAlchemy the ** on ** parameter no
-            # longer exists. it causes a ** TypeError ** exception
-            if on is not None:
-                raise TypeError("'on' is not supported on SQLAlchemy 1.4+")
-
-            try:
-                super(DropView, self).__init__(element, bind=bind)
-            except TypeError:
-                # Since version 2.0.0 of SQLAlchemy the ** bind ** parameter no
-                # longer exists. it causes a ** TypeError ** exception
-                if bind is not None:
-                    raise TypeError(
-                        "'bind' is not supported on SQLAlchemy 2.0+")
-
-                super(DropView, self).__init__(element)
+                 cascade=False, if_exists=False, materialized=False):
+        super(DropView, self).__init__(element, on=on, bind=bind)
 
         self.cascade = cascade
         self.if_exists = if_exists
+        self.materialized = materialized
 
 
 @compiles(DropView)
 def compile(drop, compiler, **kw):
-    text = "\nDROP VIEW "
+    text = "\nDROP "
+    if drop.materialized:
+        text += "MATERIALIZED "
+    text += "VIEW "
     if drop.if_exists:
         text += "IF EXISTS "
     text += compiler.preparer.format_table(drop.element)
     if drop.cascade:
         text += " CASCADE"
     return text
+
+
+class DropViews(DDLElement):
+    """
+    Prepares a single DROP VIEW statement for several views.
+
+    Only some databases (e.g. PostgreSQL, MySQL and SQL Server) accept more
+    than one view in a DROP VIEW statement; see
+    :func:`sqlalchemy_views.bulk.drop_views` for a helper that falls back
+    to one statement per view elsewhere.
+
+    Parameters
+    ----------
+    elements: list of sqlalchemy.Table
+        The views to drop.
+    cascade: boolean
+        Also drop any dependent views.
+    if_exists: boolean
+        Do nothing for views that do not exist.
+    materialized: boolean
+        If True, materialized views are dropped.
+
+    Compiling raises a ValueError for clauses the database does not
+    support: ``cascade`` and ``materialized`` on SQL Server and
+    ``materialized`` on MySQL.
+    """
+
+    __visit_name__ = "drop_views"
+
+    def __init__(self, elements, cascade=False, if_exists=False,
+                 materialized=False):
+        self.elements = list(elements)
+        if not self.elements:
+            raise ValueError("DropViews needs at least one view")
+        self.cascade = cascade
+        self.if_exists = if_exists
+        self.materialized = materialized
+
+
+# Clauses that databases accepting several views in a DROP VIEW reject.
+_UNSUPPORTED_DROP_VIEWS_CLAUSES = {
+    'mssql': ['cascade', 'materialized'],
+    'mysql': ['materialized'],
+    'mariadb': ['materialized'],
+}
+
+
+def _check_drop_views(drop, dialect_name):
+    for clause in _UNSUPPORTED_DROP_VIEWS_CLAUSES.get(dialect_name, []):
+        if getattr(drop, clause):
+            raise ValueError("DROP VIEW on %s does not support %s"
+                             % (dialect_name, clause))
+
+
+@compiles(DropViews)
+def visit_drop_views(drop, compiler, **kw):
+    _check_drop_views(drop, compiler.dialect.name)
+    text = "\nDROP "
+    if drop.materialized:
+        text += "MATERIALIZED "
+    text += "VIEW "
+    if drop.if_exists:
+        text += "IF EXISTS "
+    text += ", ".join(compiler.preparer.format_table(element)
+                      for element in drop.elements)
+    if drop.cascade:
+        text += " CASCADE"
+    return text
+
+
+class RefreshMaterializedView(_CreateDropViewBase):
+    """
+    Prepares a REFRESH MATERIALIZED VIEW statement.
+
+    Parameters
+    ----------
+    element: sqlalchemy.Table
+        The materialized view to refresh.
+    concurrently: boolean
+        Refresh without locking out concurrent reads of the view.
+        PostgreSQL requires a unique index on the view for this.
+    """
+
+    __visit_name__ = "refresh_materialized_view"
+
+    def __init__(self, element, on=None, bind=None, concurrently=False):
+        super(RefreshMaterializedView, self).__init__(
+            element, on=on, bind=bind)
+
+        self.concurrently = concurrently
+
+
+@compiles(RefreshMaterializedView)
+def visit_refresh_materialized_view(refresh, compiler, **kw):
+    text = "\nREFRESH MATERIALIZED VIEW "
+    if refresh.concurrently:
+        text += "CONCURRENTLY "
+    text += compiler.preparer.format_table(refresh.element)
+    return text
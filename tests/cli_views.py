@@ -0,0 +1,26 @@
+"""View definitions loaded by the CLI and deploy tests."""
+
+import sqlalchemy as sa
+
+from sqlalchemy_views import CreateView
+
+metadata = sa.MetaData()
+t1 = sa.Table('t1', metadata,
+              sa.Column('col1', sa.Integer(), primary_key=True),
+              sa.Column('col2', sa.Integer()))
+
+base_view = sa.Table('base_view', sa.MetaData(),
+                     sa.Column('col1', sa.Integer()),
+                     sa.Column('col2', sa.Integer()))
+top_view = sa.Table('top_view', sa.MetaData())
+
+# Defined before the view it reads from, to exercise dependency ordering.
+create_top = CreateView(top_view, sa.select(base_view.c.col1))
+create_base = CreateView(base_view, sa.select(t1).where(t1.c.col2 > 0))
+other_views = [
+    CreateView(sa.Table('other_view', sa.MetaData()), sa.select(t1.c.col2)),
+]
+
+
+def only_base():
+    return [create_base]
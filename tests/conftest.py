@@ -0,0 +1,27 @@
+import re
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+t1 = Table('t1', sa.MetaData(),
+           sa.Column('col1', sa.Integer(), primary_key=True),
+           sa.Column('col2', sa.Integer()))
+
+
+def clean(query):
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+@pytest.fixture
+def connect_args():
+    return {}
+
+
+@pytest.fixture
+def engine(tmp_path, connect_args):
+    engine = sa.create_engine(
+        'sqlite:///%s' % tmp_path.joinpath('db.sqlite'),
+        connect_args=connect_args)
+    yield engine
+    engine.dispose()
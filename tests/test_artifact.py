@@ -0,0 +1,83 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+from sqlalchemy_views import CreateView, DropViews
+from sqlalchemy_views.artifact import (
+    ViewArtifact, compile_artifact, write_artifact)
+from conftest import clean, t1
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, compress):
+    statements = {
+        'postgresql': dict(('view_%d' % i, 'SELECT %d' % (i % 3))
+                           for i in range(50)),
+        'sqlite': {'view_0': 'SELECT 0', u'vue_\xe9': u'SELECT \xe9'},
+    }
+    path = str(tmp_path.joinpath('views.sqva'))
+    with open(path, 'wb') as f:
+        write_artifact(f, statements, compress=compress)
+    with ViewArtifact(path) as artifact:
+        assert artifact.dialects == ['postgresql', 'sqlite']
+        assert artifact.compressed == compress
+        for dialect, views in statements.items():
+            assert sorted(artifact.names(dialect)) == sorted(views)
+            for name, statement in views.items():
+                assert artifact.get(dialect, name) == statement
+        with pytest.raises(KeyError):
+            artifact.get('postgresql', 'missing')
+        with pytest.raises(KeyError):
+            artifact.get('mysql', 'view_0')
+
+
+def test_strings_are_deduplicated(tmp_path):
+    statement = 'SELECT %s' % ', '.join('col%d' % i for i in range(200))
+    paths = []
+    for count in (1, 10):
+        path = tmp_path.joinpath('views_%d.sqva' % count)
+        with open(str(path), 'wb') as f:
+            write_artifact(f, {
+                'postgresql': dict(('v%d' % i, statement)
+                                   for i in range(count)),
+                'mysql': {'v0': statement},
+            }, compress=False)
+        paths.append(path)
+    size_1, size_10 = [p.stat().st_size for p in paths]
+    assert size_10 - size_1 < len(statement)
+
+
+def test_compile_artifact(tmp_path):
+    elements = [CreateView(Table('view_%d' % i, sa.MetaData()),
+                           sa.select(t1).where(t1.c.col2 > i))
+                for i in range(3)]
+    path = str(tmp_path.joinpath('views.sqva'))
+    with open(path, 'wb') as f:
+        compile_artifact(f, elements, ['postgresql', 'sqlite'], processes=1)
+    with ViewArtifact(path) as artifact:
+        assert clean(artifact.get('sqlite', 'view_2')) == (
+            'CREATE VIEW view_2 AS SELECT t1.col1, t1.col2 FROM t1 '
+            'WHERE t1.col2 > 2')
+
+
+def test_compile_artifact_duplicate_views(tmp_path):
+    view = Table('myview', sa.MetaData())
+    elements = [CreateView(view, sa.select(t1)),
+                CreateView(view, sa.select(t1))]
+    with open(str(tmp_path.joinpath('views.sqva')), 'wb') as f:
+        with pytest.raises(ValueError):
+            compile_artifact(f, elements, ['sqlite'])
+
+
+def test_compile_artifact_requires_single_views(tmp_path):
+    views = [Table('view_%d' % i, sa.MetaData()) for i in range(2)]
+    with open(str(tmp_path.joinpath('views.sqva')), 'wb') as f:
+        with pytest.raises(ValueError, match='DropViews'):
+            compile_artifact(f, [DropViews(views)], ['sqlite'])
+
+
+def test_not_an_artifact(tmp_path):
+    path = tmp_path.joinpath('other')
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        ViewArtifact(str(path))
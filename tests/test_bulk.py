@@ -0,0 +1,73 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+from sqlalchemy.dialects import mssql
+
+from sqlalchemy_views import DropViews
+from sqlalchemy_views.bulk import drop_views
+from conftest import clean
+
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.exec_driver_sql('CREATE VIEW v1 AS SELECT 1 AS a')
+        conn.exec_driver_sql('CREATE VIEW v2 AS SELECT 2 AS a')
+        yield conn
+
+
+def test_drop_views_multi_target():
+    statements = []
+
+    def executor(sql, *args, **kwargs):
+        statements.append(str(sql.compile(dialect=engine.dialect)))
+
+    engine = sa.create_mock_engine('postgresql://', executor)
+    views = [Table('v%d' % i, sa.MetaData()) for i in range(3)]
+    drop_views(engine, views, cascade=True, if_exists=True)
+    assert [clean(s) for s in statements] == [
+        'DROP VIEW IF EXISTS v0, v1, v2 CASCADE']
+
+
+def test_drop_views_checks_existence_once(connection):
+    queries = []
+    sa.event.listen(connection, 'before_cursor_execute',
+                    lambda conn, cursor, statement, *args:
+                        queries.append(clean(statement)))
+    views = [Table(name, sa.MetaData()) for name in ('v1', 'missing', 'v2')]
+    drop_views(connection, views, if_exists=True)
+    assert len(queries) == 3
+    assert queries[1:] == ['DROP VIEW v1', 'DROP VIEW v2']
+    assert sa.inspect(connection).get_view_names() == []
+
+
+def test_drop_views_without_if_exists(connection):
+    views = [Table('v1', sa.MetaData()), Table('missing', sa.MetaData())]
+    with pytest.raises(sa.exc.OperationalError):
+        drop_views(connection, views)
+
+
+def test_drop_no_views(connection):
+    assert drop_views(connection, []) == []
+
+
+@pytest.mark.parametrize('url, options', [
+    ('mssql://', {'cascade': True}),
+    ('mssql://', {'materialized': True}),
+    ('mysql://', {'materialized': True}),
+])
+def test_drop_views_unsupported_clauses(url, options):
+    statements = []
+    engine = sa.create_mock_engine(
+        url, lambda sql, *args, **kwargs: statements.append(sql))
+    views = [Table('v%d' % i, sa.MetaData()) for i in range(2)]
+    with pytest.raises(ValueError):
+        drop_views(engine, views, **options)
+    assert statements == []
+
+
+def test_compile_drop_views_unsupported_clause():
+    drop = DropViews([Table('v1', sa.MetaData())], cascade=True)
+    with pytest.raises(ValueError):
+        drop.compile(dialect=mssql.dialect())
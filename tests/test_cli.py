@@ -0,0 +1,95 @@
+import io
+import sys
+
+import pytest
+import sqlalchemy as sa
+
+import cli_views
+from sqlalchemy_views.cli import main
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = 'sqlite:///%s' % tmp_path.joinpath('db.sqlite')
+    engine = sa.create_engine(url)
+    cli_views.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+def run(*argv):
+    out = io.StringIO()
+    status = main(list(argv), out=out)
+    return status, out.getvalue()
+
+
+def test_plan(url):
+    status, output = run('plan', 'cli_views', '--url', url)
+    assert status == 0
+    assert output.index('-- create: base_view') < output.index(
+        '-- create: top_view')
+    assert 'CREATE VIEW other_view AS SELECT t1.col2' in output
+    assert '-- lock impact: none, a new object is created' in output
+
+
+def test_apply_diff_bench(url):
+    status, output = run('apply', 'cli_views', '--url', url)
+    assert status == 0
+    assert '3 views changed, 0 unchanged' in output
+
+    status, output = run('plan', 'cli_views', '--url', url)
+    assert output.strip() == 'No changes.'
+    status, output = run('diff', 'cli_views', '--url', url)
+    assert output == ''
+
+    status, output = run('bench', 'cli_views:other_views', '--url', url,
+                         '--repeat', '2')
+    assert status == 0
+    assert output.startswith('other_view')
+
+
+def test_apply_failure(url):
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        conn.exec_driver_sql('CREATE TABLE top_view (a INTEGER)')
+    engine.dispose()
+    status, output = run('apply', 'cli_views', '--url', url)
+    assert status == 1
+    lines = output.splitlines()
+    assert [line.split(' (')[0] for line in lines[:2]] == [
+        'create base_view', 'create other_view']
+    assert lines[2].startswith('error: ')
+    assert 'top_view already exists' in lines[2]
+
+
+def test_refresh_failure(url):
+    status, output = run('refresh', 'missing_view', '--url', url)
+    assert status == 1
+    assert output.startswith('failed missing_view')
+
+
+def test_requires_command():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+def test_views_from_current_directory(url, tmp_path, monkeypatch):
+    tmp_path.joinpath('cwd_views.py').write_text(
+        'import sqlalchemy as sa\n'
+        'from sqlalchemy_views import CreateView\n'
+        'view = CreateView(sa.Table("cwd_view", sa.MetaData()),\n'
+        '                  sa.text("SELECT 1"))\n')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'path', [p for p in sys.path
+                                      if p not in ('', str(tmp_path))])
+    status, output = run('plan', 'cwd_views', '--url', url)
+    assert status == 0
+    assert '-- create: cwd_view' in output
+    assert str(tmp_path) not in sys.path
+
+
+def test_missing_module(url):
+    status, output = run('plan', 'no_such_views', '--url', url)
+    assert status == 1
+    assert output.startswith(
+        'error: cannot load views from no_such_views: No module named')
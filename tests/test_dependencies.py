@@ -0,0 +1,74 @@
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_views.dependencies import (
+    DependencyCache, DependencyGraph, load_dependency_graph)
+
+
+@pytest.fixture
+def engine(engine):
+    with engine.begin() as conn:
+        conn.execute(sa.text(
+            "CREATE TABLE orders (id INTEGER, total INTEGER)"))
+        conn.execute(sa.text("CREATE TABLE customers (id INTEGER)"))
+        conn.execute(sa.text(
+            'CREATE VIEW big_orders AS SELECT * FROM "orders" '
+            'WHERE total > 100'))
+        conn.execute(sa.text(
+            "CREATE VIEW big_order_count AS SELECT count(*) AS n "
+            "FROM big_orders"))
+        conn.execute(sa.text(
+            "CREATE VIEW report AS SELECT * FROM big_order_count, customers"))
+    return engine
+
+
+def test_load_dependency_graph(engine):
+    with engine.connect() as conn:
+        graph = load_dependency_graph(conn)
+    assert graph.views == set([
+        (None, 'big_orders'), (None, 'big_order_count'), (None, 'report')])
+    assert graph.depends_on('report') == set([
+        (None, 'big_order_count'), (None, 'customers')])
+    assert graph.dependents(sa.Table('orders', sa.MetaData())) == set([
+        (None, 'big_orders')])
+    assert graph.impact('orders') == [
+        (None, 'big_orders'), (None, 'big_order_count'), (None, 'report')]
+    assert graph.impact('customers') == [(None, 'report')]
+    assert graph.impact('report') == []
+    assert 'orders' in graph
+    assert 'missing' not in graph
+
+
+def test_sort():
+    graph = DependencyGraph([((None, 'b'), (None, 'a')),
+                             ((None, 'c'), (None, 'b'))])
+    assert graph.sort(['c', 'a', 'b']) == [
+        (None, 'a'), (None, 'b'), (None, 'c')]
+    cycle = DependencyGraph([((None, 'a'), (None, 'b')),
+                             ((None, 'b'), (None, 'a'))])
+    with pytest.raises(ValueError):
+        cycle.sort(['a', 'b'])
+
+
+def test_cache_invalidated_by_ddl(engine):
+    cache = DependencyCache(engine, check_version=False)
+    graph = cache.graph()
+    assert cache.graph() is graph
+    with engine.begin() as conn:
+        conn.execute(sa.text(
+            "CREATE VIEW customer_ids AS SELECT id FROM customers"))
+    assert cache.graph().impact('customers') == [
+        (None, 'customer_ids'), (None, 'report')]
+    cache.close()
+
+
+def test_cache_invalidated_by_version(engine):
+    cache = DependencyCache(engine, listen=False)
+    graph = cache.graph()
+    assert cache.graph() is graph
+
+    other = sa.create_engine(engine.url)
+    with other.begin() as conn:
+        conn.execute(sa.text("DROP VIEW report"))
+    other.dispose()
+    assert cache.graph().impact('customers') == []
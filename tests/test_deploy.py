@@ -0,0 +1,146 @@
+import pytest
+import sqlalchemy as sa
+
+import cli_views
+from sqlalchemy_views import CreateView
+from sqlalchemy_views import deploy
+from sqlalchemy_views.deploy import (
+    apply, dependency_levels, fan_out, load_views, plan)
+
+
+@pytest.fixture
+def engine(engine):
+    cli_views.metadata.create_all(engine)
+    return engine
+
+
+def names(create_views):
+    return [cv.element.name for cv in create_views]
+
+
+def test_load_views():
+    assert names(load_views('cli_views')) == [
+        'top_view', 'base_view', 'other_view']
+    assert names(load_views('cli_views:other_views')) == ['other_view']
+    assert names(load_views('cli_views:create_top')) == ['top_view']
+    assert names(load_views('cli_views:only_base')) == ['base_view']
+
+
+def test_dependency_levels():
+    levels = dependency_levels(load_views('cli_views'))
+    assert [names(level) for level in levels] == [
+        ['base_view', 'other_view'], ['top_view']]
+
+
+def test_dependency_cycle():
+    a = sa.Table('a', sa.MetaData(), sa.Column('x', sa.Integer()))
+    b = sa.Table('b', sa.MetaData(), sa.Column('x', sa.Integer()))
+    with pytest.raises(ValueError):
+        dependency_levels([CreateView(a, sa.select(b)),
+                           CreateView(b, sa.select(a))])
+
+
+def test_plan_and_apply(engine):
+    create_views = load_views('cli_views')
+    with engine.connect() as conn:
+        changes = plan(conn, create_views)
+    assert [(c.name, c.action) for c in changes] == [
+        ('base_view', 'create'), ('other_view', 'create'),
+        ('top_view', 'create')]
+    results = apply(engine, changes, workers=2)
+    assert len(results) == 3
+    assert sorted(sa.inspect(engine).get_view_names()) == [
+        'base_view', 'other_view', 'top_view']
+
+    t1 = cli_views.t1
+    changed = CreateView(cli_views.base_view,
+                         sa.select(t1).where(t1.c.col2 > 1))
+    with engine.connect() as conn:
+        changes = plan(conn, [changed] + create_views[:1] + create_views[2:])
+    assert [(c.name, c.action) for c in changes] == [
+        ('base_view', 'rebuild'), ('other_view', 'unchanged'),
+        ('top_view', 'unchanged')]
+    assert 't1.col2 > 0' in changes[0].old_definition
+    assert 't1.col2 > 1' in changes[0].new_definition
+    assert [c.name for c, stats in apply(engine, changes)] == ['base_view']
+    with engine.connect() as conn:
+        assert [c.action for c in plan(conn, [changed])] == ['unchanged']
+
+
+def test_plan_flattened(engine):
+    create_views = load_views('cli_views')
+    flattened = CreateView(cli_views.top_view, create_views[0].selectable,
+                           flatten=create_views[1:])
+    with engine.connect() as conn:
+        apply(engine, plan(conn, create_views[1:] + [flattened]))
+        changes = plan(conn, create_views[1:] + [flattened])
+    assert [(c.name, c.action) for c in changes] == [
+        ('base_view', 'unchanged'), ('other_view', 'unchanged'),
+        ('top_view', 'unchanged')]
+    assert 'FROM t1' in changes[2].new_definition
+
+
+@pytest.fixture
+def shards(tmp_path):
+    engines = []
+    for i in range(4):
+        engine = sa.create_engine(
+            'sqlite:///%s' % tmp_path.joinpath('shard%d.sqlite' % i))
+        cli_views.metadata.create_all(engine)
+        engines.append(engine)
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def test_fan_out(shards, monkeypatch):
+    compiled = []
+    compile_definition = deploy.compile_definition
+    monkeypatch.setattr(deploy, 'compile_definition',
+                        lambda cv, dialect: compiled.append(cv) or
+                        compile_definition(cv, dialect))
+
+    results = fan_out(shards, load_views('cli_views'), shards=2, workers=2)
+    assert [r.engine for r in results] == shards
+    assert all(r.ok for r in results)
+    assert [len(r.results) for r in results] == [3, 3, 3, 3]
+    assert len(compiled) == 3
+    for engine in shards:
+        assert sorted(sa.inspect(engine).get_view_names()) == [
+            'base_view', 'other_view', 'top_view']
+
+    results = fan_out(shards, load_views('cli_views'))
+    assert [len(r.results) for r in results] == [0, 0, 0, 0]
+
+
+def test_fan_out_canary_failure(shards):
+    with shards[0].begin() as conn:
+        conn.execute(sa.text('CREATE TABLE other_view (x INTEGER)'))
+    results = fan_out(shards, load_views('cli_views'))
+    assert results[0].error is not None
+    assert not results[0].skipped
+    assert [r.skipped for r in results[1:]] == [True, True, True]
+    for engine in shards[1:]:
+        assert sa.inspect(engine).get_view_names() == []
+
+
+def test_fan_out_partial_failure(shards):
+    # The views of the first level are created, top_view then fails.
+    with shards[0].begin() as conn:
+        conn.execute(sa.text('CREATE TABLE top_view (x INTEGER)'))
+    results = fan_out(shards, load_views('cli_views'))
+    assert results[0].error is not None
+    assert sorted(c.name for c, stats in results[0].results) == [
+        'base_view', 'other_view']
+    assert [r.skipped for r in results[1:]] == [True, True, True]
+
+
+def test_apply_reports_applied_changes(engine):
+    with engine.begin() as conn:
+        conn.execute(sa.text('CREATE TABLE top_view (x INTEGER)'))
+    with engine.connect() as conn:
+        changes = plan(conn, load_views('cli_views'))
+    with pytest.raises(Exception) as excinfo:
+        apply(engine, changes)
+    assert sorted(c.name for c, stats in excinfo.value.applied) == [
+        'base_view', 'other_view']
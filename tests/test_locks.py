@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+from sqlalchemy_views import CreateView, DropView
+from sqlalchemy_views.locks import (
+    LockTimeoutError, backoff_delay, execute_ddl, is_lock_timeout,
+    set_timeouts)
+
+
+@pytest.fixture
+def connect_args():
+    return {'timeout': 0}
+
+
+def make_view():
+    return Table('myview', sa.MetaData())
+
+
+def test_backoff_delay():
+    assert 0 <= backoff_delay(0, base=1.0) <= 1.0
+    assert 0 <= backoff_delay(10, base=1.0, maximum=5.0) <= 5.0
+
+
+def test_set_timeouts_postgresql():
+    statements = []
+    engine = sa.create_mock_engine(
+        'postgresql://', lambda sql, *a, **kw: statements.append(str(sql)))
+    set_timeouts(engine, statement_timeout=60, lock_timeout=0.5)
+    assert statements == ['SET LOCAL statement_timeout = 60000',
+                          'SET LOCAL lock_timeout = 500']
+
+
+def test_set_timeouts_mysql():
+    statements = []
+    engine = sa.create_mock_engine(
+        'mysql://', lambda sql, *a, **kw: statements.append(str(sql)))
+    set_timeouts(engine, statement_timeout=60, lock_timeout=0.5)
+    assert statements == ['SET SESSION lock_wait_timeout = 1']
+
+
+def test_execute_ddl(engine):
+    stats = execute_ddl(engine, [CreateView(make_view(), sa.text('SELECT 1'))])
+    assert stats.attempts == 1
+    assert stats.retries == 0
+    assert stats.waited == 0
+    assert sa.inspect(engine).get_view_names() == ['myview']
+
+
+def test_execute_ddl_retries(engine):
+    locker = engine.raw_connection()
+    locker.execute('BEGIN EXCLUSIVE')
+    threading.Timer(0.3, locker.rollback).start()
+    stats = execute_ddl(engine, CreateView(make_view(), sa.text('SELECT 1')),
+                        retries=20, backoff=0.05, max_backoff=0.1)
+    locker.close()
+    assert stats.retries > 0
+    assert stats.waited > 0
+    assert stats.seconds >= stats.waited
+
+
+def test_execute_ddl_gives_up(engine):
+    locker = engine.raw_connection()
+    locker.execute('BEGIN EXCLUSIVE')
+    try:
+        with pytest.raises(LockTimeoutError) as excinfo:
+            execute_ddl(engine, CreateView(make_view(), sa.text('SELECT 1')),
+                        retries=2, backoff=0.01)
+    finally:
+        locker.rollback()
+        locker.close()
+    assert excinfo.value.stats.attempts == 3
+    assert is_lock_timeout(excinfo.value.error)
+
+
+def test_execute_ddl_other_errors(engine):
+    with pytest.raises(sa.exc.OperationalError):
+        execute_ddl(engine, DropView(make_view()))
@@ -0,0 +1,212 @@
+import io
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+pytest.importorskip('alembic')
+
+from alembic.autogenerate import produce_migrations, render_python_code
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from sqlalchemy_views import CreateView, migration
+from sqlalchemy_views.migration import (
+    CreateViewOp, DropViewOp, ReplaceViewOp, normalize_definition)
+from conftest import clean
+
+metadata = sa.MetaData()
+t1 = Table('t1', metadata,
+           sa.Column('col1', sa.Integer(), primary_key=True),
+           sa.Column('col2', sa.Integer()))
+
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine('sqlite://')
+    with engine.begin() as conn:
+        metadata.create_all(conn)
+        conn.exec_driver_sql(
+            'CREATE VIEW unchanged AS SELECT t1.col1, t1.col2 FROM t1')
+        conn.exec_driver_sql(
+            'CREATE VIEW changed AS SELECT t1.col1 FROM t1')
+        conn.exec_driver_sql('CREATE VIEW unmanaged AS SELECT 1')
+        yield conn
+
+
+def view_definitions():
+    return [
+        CreateView(Table('unchanged', sa.MetaData()), sa.select(t1)),
+        CreateView(Table('changed', sa.MetaData()),
+                   sa.select(t1).where(t1.c.col2 > 5)),
+        CreateView(Table('created', sa.MetaData()), sa.select(t1.c.col2)),
+    ]
+
+
+def produce(connection, **opts):
+    opts['view_definitions'] = view_definitions()
+    context = MigrationContext.configure(connection, opts=opts)
+    return produce_migrations(context, metadata)
+
+
+def test_normalize_definition():
+    assert normalize_definition(
+        'CREATE VIEW "v" AS\n  SELECT t1.col1,\n    t1.col2\n   FROM t1;'
+    ) == normalize_definition('SELECT t1.col1, t1.col2 FROM t1')
+    assert normalize_definition(
+        'SELECT a FROM t WHERE ((t.a = 1) OR (t.b = 2)) AND (t.c = 3)'
+    ) == normalize_definition(
+        'SELECT a FROM t WHERE (t.a = 1 OR t.b = 2) AND t.c = 3')
+
+
+def test_normalize_definition_detects_changes():
+    assert normalize_definition(
+        'SELECT a FROM t WHERE (a = 1 OR b = 2) AND c = 3'
+    ) != normalize_definition(
+        'SELECT a FROM t WHERE a = 1 OR (b = 2 AND c = 3)')
+    assert normalize_definition(
+        "SELECT a FROM t WHERE status = 'Active'"
+    ) != normalize_definition(
+        "SELECT a FROM t WHERE status = 'active'")
+    assert normalize_definition(
+        'SELECT (a + b) * c FROM t') != normalize_definition(
+        'SELECT a + b * c FROM t')
+
+
+def test_normalize_definition_mysql():
+    stored = ('select `db`.`t1`.`col1` AS `col1`,`db`.`t1`.`col2` AS `col2` '
+              'from `db`.`t1` where (`db`.`t1`.`col1` > 1)')
+    compiled = 'SELECT t1.col1, t1.col2 \nFROM t1 \nWHERE t1.col1 > 1'
+    assert normalize_definition(stored, 'db') == normalize_definition(
+        compiled, 'db')
+    assert normalize_definition(
+        'SELECT t1.col1 AS renamed FROM t1', 'db') != normalize_definition(
+        'SELECT t1.col1 FROM t1', 'db')
+
+
+def test_autogenerate_only_changed_views(connection):
+    ops = produce(connection).upgrade_ops.ops
+    assert [type(op) for op in ops] == [ReplaceViewOp, CreateViewOp]
+    assert ops[0].view_name == 'changed'
+    assert clean(ops[0].definition) == (
+        'SELECT t1.col1, t1.col2 FROM t1 WHERE t1.col2 > 5')
+    assert clean(ops[0].old_definition) == 'SELECT t1.col1 FROM t1'
+    assert ops[1].view_name == 'created'
+
+
+def test_autogenerate_drops(connection):
+    ops = produce(connection, include_view_drops=True).upgrade_ops.ops
+    assert [type(op) for op in ops] == [
+        ReplaceViewOp, CreateViewOp, DropViewOp]
+    assert ops[2].view_name == 'unmanaged'
+    assert ops[2].reverse().definition == 'SELECT 1'
+
+
+def test_render(connection):
+    code = render_python_code(produce(connection).upgrade_ops)
+    assert "op.replace_view('changed'," in code
+    assert "op.create_view('created', 'SELECT t1.col2 \\nFROM t1')" in code
+
+
+def test_operations(connection):
+    op = Operations(MigrationContext.configure(connection))
+    op.create_view('created', 'SELECT col2 FROM t1')
+    assert list(connection.exec_driver_sql(
+        'SELECT * FROM created').keys()) == ['col2']
+    op.drop_view('created')
+    assert 'created' not in sa.inspect(connection).get_view_names()
+
+
+def test_offline_replace():
+    buf = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name='postgresql', opts={'as_sql': True, 'output_buffer': buf})
+    Operations(context).replace_view('myview', 'SELECT col1 FROM t1',
+                                     schema='myschema')
+    assert clean(buf.getvalue()) == (
+        'CREATE OR REPLACE VIEW myschema.myview AS SELECT col1 FROM t1;')
+
+
+def test_autogenerate_materialized(connection, monkeypatch):
+    monkeypatch.setattr(migration, 'load_materialized_view_names',
+                        lambda conn: set([(None, 'unmanaged')]))
+    opts = {
+        'include_view_drops': True,
+        'view_definitions': [CreateView(Table('summary', sa.MetaData()),
+                                        sa.select(t1.c.col1),
+                                        materialized=True)],
+    }
+    context = MigrationContext.configure(connection, opts=opts)
+    upgrade_ops = produce_migrations(context, metadata).upgrade_ops
+    ops = dict((op.view_name, op) for op in upgrade_ops.ops)
+    create_op, drop_op = ops['summary'], ops['unmanaged']
+    assert not ops['changed'].materialized
+    assert create_op.materialized
+    assert drop_op.view_name == 'unmanaged'
+    assert drop_op.materialized
+    assert drop_op.reverse().materialized
+    code = render_python_code(upgrade_ops)
+    assert "op.create_view('summary'," in code
+    assert "materialized=True)" in code
+    assert "op.drop_view('unmanaged', definition='SELECT 1', " \
+        "materialized=True)" in code
+
+
+def test_offline_materialized():
+    buf = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name='postgresql', opts={'as_sql': True, 'output_buffer': buf})
+    op = Operations(context)
+    op.replace_view('myview', 'SELECT col1 FROM t1', materialized=True)
+    op.drop_view('myview', materialized=True)
+    assert clean(buf.getvalue()) == (
+        'DROP MATERIALIZED VIEW myview; '
+        'CREATE MATERIALIZED VIEW myview AS SELECT col1 FROM t1; '
+        'DROP MATERIALIZED VIEW myview;')
+
+
+def test_autogenerate_options(connection, monkeypatch):
+    monkeypatch.setattr(migration, 'load_view_options', lambda conn: {
+        (None, 'unchanged'): frozenset([('check_option', 'local')])})
+    opts = {'view_definitions': [
+        CreateView(Table('unchanged', sa.MetaData(), sa.Column('a'),
+                         sa.Column('b')),
+                   sa.select(t1), options={'security_barrier': 'true'},
+                   check_option='cascaded')]}
+    context = MigrationContext.configure(connection, opts=opts)
+    upgrade_ops = produce_migrations(context, metadata).upgrade_ops
+    op, = upgrade_ops.ops
+    assert isinstance(op, ReplaceViewOp)
+    assert op.columns == ['a', 'b']
+    assert op.options == {'security_barrier': 'true'}
+    assert op.check_option == 'cascaded'
+    assert op.old_options is None
+    assert op.old_check_option == 'local'
+    reverse = op.reverse()
+    assert reverse.options is None
+    assert reverse.check_option == 'local'
+    code = render_python_code(upgrade_ops)
+    assert "check_option='cascaded'" in code
+    assert "columns=['a', 'b']" in code
+    assert "old_check_option='local'" in code
+
+
+def test_autogenerate_rejects_unsupported_clauses(connection):
+    opts = {'view_definitions': [
+        CreateView(Table('unchanged', sa.MetaData()), sa.select(t1),
+                   secure=True)]}
+    context = MigrationContext.configure(connection, opts=opts)
+    with pytest.raises(ValueError, match='secure'):
+        produce_migrations(context, metadata)
+
+
+def test_offline_clauses():
+    buf = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name='postgresql', opts={'as_sql': True, 'output_buffer': buf})
+    Operations(context).create_view(
+        'myview', 'SELECT col1 FROM t1', columns=['a'],
+        options={'security_barrier': 'true'}, check_option='local')
+    assert clean(buf.getvalue()) == (
+        'CREATE VIEW myview (a) WITH (security_barrier=true) '
+        'AS SELECT col1 FROM t1 WITH LOCAL CHECK OPTION;')
@@ -0,0 +1,75 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+from sqlalchemy.orm import Session, declarative_base
+
+from sqlalchemy_views.orm import ReadOnlyView, ReadOnlyViewError
+
+Base = declarative_base()
+
+orders = Table('orders', Base.metadata,
+               sa.Column('id', sa.Integer(), primary_key=True),
+               sa.Column('user_id', sa.Integer()),
+               sa.Column('amount', sa.Integer()))
+
+
+class UserTotals(ReadOnlyView, Base):
+    __tablename__ = 'user_totals'
+    __view__ = sa.select(
+        orders.c.user_id, sa.func.sum(orders.c.amount).label('total')
+    ).group_by(orders.c.user_id)
+    __view_primary_key__ = ['user_id']
+
+
+@pytest.fixture
+def session():
+    engine = sa.create_engine('sqlite://')
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        conn.execute(UserTotals.__create_view__)
+        conn.execute(orders.insert(), [
+            {'user_id': 1, 'amount': 10},
+            {'user_id': 1, 'amount': 5},
+            {'user_id': 2, 'amount': 7},
+        ])
+    with Session(engine) as session:
+        yield session
+
+
+def test_columns_from_selectable():
+    assert UserTotals.__table__.c.keys() == ['user_id', 'total']
+    assert UserTotals.__table__.name not in Base.metadata.tables
+    assert list(UserTotals.__mapper__.primary_key) == [
+        UserTotals.__table__.c.user_id]
+
+
+def test_query(session):
+    rows = session.scalars(
+        UserTotals.view_select().order_by(UserTotals.user_id)).all()
+    assert [(r.user_id, r.total) for r in rows] == [(1, 15), (2, 7)]
+    row = session.execute(UserTotals.view_select_by_key(),
+                          {'user_id': 2}).scalar_one()
+    assert row.total == 7
+
+
+def test_statements_are_cached():
+    assert UserTotals.view_select() is UserTotals.view_select()
+    assert (UserTotals.view_select_by_key()
+            is UserTotals.view_select_by_key())
+
+
+def test_writes_are_refused(session):
+    row = session.get(UserTotals, 1)
+    row.total = row.total
+    session.flush()
+    row.total = 100
+    with pytest.raises(ReadOnlyViewError):
+        session.flush()
+    session.rollback()
+    session.add(UserTotals(user_id=3, total=1))
+    with pytest.raises(ReadOnlyViewError):
+        session.flush()
+    session.rollback()
+    session.delete(session.get(UserTotals, 2))
+    with pytest.raises(ReadOnlyViewError):
+        session.flush()
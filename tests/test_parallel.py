@@ -0,0 +1,47 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_views import CreateView, DropView
+from sqlalchemy_views.parallel import compile_views
+from conftest import clean, t1
+
+
+def make_views(count):
+    views = []
+    for i in range(count):
+        view = Table('view_%d' % i, sa.MetaData())
+        selectable = sa.sql.select(t1).where(t1.c.col2 > i)
+        views.append(CreateView(view, selectable))
+    return views
+
+
+@pytest.mark.parametrize("processes,chunksize", [
+    (1, 64),
+    (2, 3),
+    ])
+def test_compile_views_preserves_order(processes, chunksize):
+    views = make_views(10)
+    compiled = compile_views(views, processes=processes, chunksize=chunksize)
+    assert [clean(text) for text in compiled] == [
+        "CREATE VIEW view_%d AS SELECT t1.col1, t1.col2 FROM t1 "
+        "WHERE t1.col2 > %d" % (i, i) for i in range(10)]
+
+
+def test_compile_views_with_dialect_instance():
+    selectable = sa.sql.select(t1).distinct(t1.c.col2)
+    view = Table('myview', sa.MetaData())
+    elements = [CreateView(view, selectable), DropView(view, cascade=True)]
+    compiled = compile_views(elements, dialect=postgresql.dialect(),
+                             processes=2, chunksize=1)
+    assert [clean(text) for text in compiled] == [
+        "CREATE VIEW myview AS SELECT DISTINCT ON (t1.col2) "
+        "t1.col1, t1.col2 FROM t1",
+        "DROP VIEW myview CASCADE",
+    ]
+
+
+def test_compile_views_rejects_bad_chunksize():
+    with pytest.raises(ValueError):
+        compile_views(make_views(1), chunksize=0)
@@ -0,0 +1,102 @@
+import datetime
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_views.partitioned import PartitionedView
+from conftest import clean
+
+events = Table('events', sa.MetaData(),
+               sa.Column('day', sa.Date()),
+               sa.Column('amount', sa.Integer()))
+
+
+def compile_query(query):
+    return str(query.compile(dialect=postgresql.dialect(),
+                             compile_kwargs={'literal_binds': True}))
+
+
+def make_view():
+    selectable = sa.select(
+        events.c.day, sa.func.sum(events.c.amount).label('total')
+    ).group_by(events.c.day)
+    return PartitionedView(
+        Table('daily', sa.MetaData()), selectable, events.c.day, [
+            ('old', None, datetime.date(2024, 1, 1)),
+            ('2024', datetime.date(2024, 1, 1), datetime.date(2025, 1, 1)),
+            ('new', datetime.date(2025, 1, 1), None),
+        ])
+
+
+def test_create():
+    statements = [clean(compile_query(s)) for s in make_view().create()]
+    assert statements == [
+        "CREATE MATERIALIZED VIEW daily_old (day, total) AS "
+        "SELECT events.day, sum(events.amount) AS total FROM events "
+        "WHERE events.day < '2024-01-01' GROUP BY events.day",
+        "CREATE MATERIALIZED VIEW daily_2024 (day, total) AS "
+        "SELECT events.day, sum(events.amount) AS total FROM events "
+        "WHERE events.day >= '2024-01-01' AND events.day < '2025-01-01' "
+        "GROUP BY events.day",
+        "CREATE MATERIALIZED VIEW daily_new (day, total) AS "
+        "SELECT events.day, sum(events.amount) AS total FROM events "
+        "WHERE events.day >= '2025-01-01' GROUP BY events.day",
+        "CREATE VIEW daily AS "
+        "SELECT daily_old.day, daily_old.total FROM daily_old UNION ALL "
+        "SELECT daily_2024.day, daily_2024.total FROM daily_2024 UNION ALL "
+        "SELECT daily_new.day, daily_new.total FROM daily_new",
+    ]
+
+
+def test_drop():
+    statements = [clean(compile_query(s)) for s in make_view().drop()]
+    assert statements == [
+        "DROP VIEW daily",
+        "DROP MATERIALIZED VIEW daily_old",
+        "DROP MATERIALIZED VIEW daily_2024",
+        "DROP MATERIALIZED VIEW daily_new",
+    ]
+
+
+def test_refresh_single_partition():
+    view = make_view()
+    assert clean(compile_query(view.refresh('2024'))) == (
+        "REFRESH MATERIALIZED VIEW daily_2024")
+    assert clean(compile_query(
+        view.refresh(value=datetime.date(2025, 6, 1), concurrently=True))
+    ) == "REFRESH MATERIALIZED VIEW CONCURRENTLY daily_new"
+    assert len(view.refresh_all()) == 3
+
+
+def test_partition_for_missing_value():
+    view = PartitionedView(
+        Table('daily', sa.MetaData()), sa.select(events), events.c.day,
+        [('2024', datetime.date(2024, 1, 1), datetime.date(2025, 1, 1))])
+    with pytest.raises(KeyError):
+        view.partition_for(datetime.date(2023, 1, 1))
+
+
+def test_duplicate_partition_names():
+    with pytest.raises(ValueError):
+        PartitionedView(Table('daily', sa.MetaData()), sa.select(events),
+                        events.c.day, [('a', None, 1), ('a', 1, None)])
+
+
+@pytest.mark.parametrize('partitions', [
+    [('a', None, 10), ('b', 5, None)],
+    [('a', None, None), ('b', 1, 2)],
+    [('a', 1, 5), ('b', None, 2)],
+    [('a', 5, 5)],
+])
+def test_overlapping_partitions(partitions):
+    with pytest.raises(ValueError):
+        PartitionedView(Table('daily', sa.MetaData()), sa.select(events),
+                        events.c.day, partitions)
+
+
+def test_adjacent_partitions():
+    view = PartitionedView(Table('daily', sa.MetaData()), sa.select(events),
+                           events.c.day, [('b', 5, None), ('a', None, 5)])
+    assert view.partition_for(5).name == 'b'
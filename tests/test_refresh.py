@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_views.locks import is_lock_timeout
+from sqlalchemy_views.refresh import RefreshRunner
+
+SLOW_QUERY = sa.text(
+    "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r) "
+    "SELECT count(*) FROM r")
+
+
+@pytest.fixture
+def connect_args():
+    return {'timeout': 0, 'check_same_thread': False}
+
+
+def test_refresh_retries_lock_timeouts(engine):
+    locker = engine.raw_connection()
+    locker.execute('BEGIN EXCLUSIVE')
+    threading.Timer(0.3, locker.rollback).start()
+    runner = RefreshRunner(engine, retries=20, backoff=0.05, max_backoff=0.1,
+                           poll_interval=0.01)
+    result = runner.refresh(sa.text('CREATE TABLE t (a INTEGER)'))
+    locker.close()
+    assert result.ok
+    assert result.attempts > 1
+    assert result.seconds > 0
+    assert not result.cancelled
+
+
+def test_refresh_gives_up(engine):
+    locker = engine.raw_connection()
+    locker.execute('BEGIN EXCLUSIVE')
+    runner = RefreshRunner(engine, retries=2, backoff=0.01,
+                           poll_interval=0.01)
+    result = runner.refresh(sa.text('CREATE TABLE t (a INTEGER)'))
+    locker.rollback()
+    locker.close()
+    assert not result.ok
+    assert is_lock_timeout(result.error)
+    assert result.attempts == 3
+
+
+def test_progress_and_cancel(engine):
+    reports = []
+
+    def progress(report):
+        reports.append(report)
+        if len(reports) == 3:
+            runner.cancel()
+
+    runner = RefreshRunner(engine, progress=progress, poll_interval=0.02)
+    results = runner.refresh_all([SLOW_QUERY, SLOW_QUERY])
+    assert len(results) == 1
+    assert results[0].cancelled
+    assert isinstance(results[0].error, sa.exc.OperationalError)
+    assert not is_lock_timeout(results[0].error)
+    assert len(reports) >= 3
+    assert set(r.attempt for r in reports) == set([0])
+    assert reports[0].elapsed < reports[-1].elapsed
+
+    # The next run is not cancelled.
+    results = runner.refresh_all([sa.text('SELECT 1')])
+    assert [(r.ok, r.cancelled) for r in results] == [(True, False)]
+
+
+def test_cancel_after_finish(engine):
+    runner = RefreshRunner(engine, poll_interval=0.01)
+
+    @sa.event.listens_for(engine, 'after_cursor_execute')
+    def finished(conn, cursor, statement, parameters, context, executemany):
+        runner.cancel()
+
+    results = runner.refresh_all([sa.text('SELECT 1'), sa.text('SELECT 2')])
+    assert [(r.ok, r.cancelled) for r in results] == [(True, False)]
+
+
+def test_refresh_postgresql_connection(engine, monkeypatch):
+    @sa.event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function('pg_backend_pid', 0, lambda: 42)
+
+    monkeypatch.setattr(engine.dialect, 'name', 'postgresql')
+    runner = RefreshRunner(engine, poll_interval=0.01)
+    result = runner.refresh(sa.text('CREATE TABLE t (a INTEGER)'))
+    assert result.ok, result.error
+    assert sa.inspect(engine).get_table_names() == ['t']
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+from sqlalchemy_views.routing import FreshnessRoutedView, refresh_log_table
+
+metadata = sa.MetaData()
+orders = Table('orders', metadata,
+               sa.Column('user_id', sa.Integer()),
+               sa.Column('amount', sa.Integer()))
+log_table = refresh_log_table(metadata)
+
+NOW = datetime.datetime(2026, 1, 1, 12, 0)
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def routed_view(clock):
+    selectable = sa.select(
+        orders.c.user_id, sa.func.sum(orders.c.amount).label('total')
+    ).group_by(orders.c.user_id)
+    return FreshnessRoutedView(
+        Table('user_totals', sa.MetaData()), selectable,
+        datetime.timedelta(minutes=5), log_table=log_table, clock=clock)
+
+
+@pytest.fixture
+def connection(routed_view):
+    engine = sa.create_engine('sqlite://')
+    with engine.begin() as conn:
+        metadata.create_all(conn)
+        # SQLite has no materialized views; a table stands in for one.
+        routed_view.element.create(conn)
+        conn.execute(orders.insert(), [{'user_id': 1, 'amount': 10},
+                                       {'user_id': 1, 'amount': 5}])
+        conn.execute(routed_view.element.insert(),
+                     [{'user_id': 1, 'total': 10}])
+        yield conn
+
+
+def totals(connection, routed_view):
+    routed = routed_view.routed()
+    return connection.execute(sa.select(routed.c.total)).scalars().all()
+
+
+def test_columns_inferred(routed_view):
+    assert routed_view.element.c.keys() == ['user_id', 'total']
+    assert routed_view.create_view.materialized
+
+
+def test_columns_must_match_by_name(routed_view):
+    view = Table('user_totals', sa.MetaData(), sa.Column('total'),
+                 sa.Column('user_id'))
+    with pytest.raises(ValueError, match='do not match'):
+        FreshnessRoutedView(view, routed_view.selectable,
+                            datetime.timedelta(minutes=5))
+
+
+def test_routing(connection, routed_view, clock):
+    assert totals(connection, routed_view) == [15]
+    routed_view.mark_refreshed(connection)
+    assert totals(connection, routed_view) == [10]
+    clock.now = NOW + datetime.timedelta(minutes=4)
+    assert totals(connection, routed_view) == [10]
+    clock.now = NOW + datetime.timedelta(minutes=6)
+    assert totals(connection, routed_view) == [15]
+    routed_view.mark_refreshed(connection)
+    assert totals(connection, routed_view) == [10]
+    assert connection.execute(sa.select(log_table)).all() == [
+        ('user_totals', NOW + datetime.timedelta(minutes=6))]
+
+
+def test_refresh_records_start_time(routed_view, clock):
+    statements = []
+
+    def executor(sql, *args, **kwargs):
+        statements.append(sql)
+        clock.now = NOW + datetime.timedelta(minutes=1)
+
+    engine = sa.create_mock_engine('postgresql://', executor)
+    routed_view.refresh(engine, concurrently=True)
+    assert len(statements) == 3
+    assert str(statements[0].compile(dialect=engine.dialect)).strip() == (
+        'REFRESH MATERIALIZED VIEW CONCURRENTLY user_totals')
+    assert statements[2].compile().params['refreshed_at'] == NOW
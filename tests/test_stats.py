@@ -0,0 +1,47 @@
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_views.stats import UsageSnapshot, ViewUsage, take_snapshot
+
+
+def test_snapshot_delta():
+    before = UsageSnapshot([
+        ViewUsage('public', 'busy', False, 100, 1000),
+        ViewUsage('public', 'reset', False, 50, 500),
+    ], taken_at=1.0)
+    after = UsageSnapshot([
+        ViewUsage('public', 'busy', False, 2100, 21000),
+        ViewUsage('public', 'reset', False, 5, 50),
+        ViewUsage('public', 'new', True, 7, 70),
+    ], taken_at=2.0)
+    delta = after.delta(before)
+    assert delta.taken_at == 2.0
+    assert delta.usage[('public', 'busy')].scans == 2000
+    assert delta.usage[('public', 'busy')].rows == 20000
+    assert delta.usage[('public', 'reset')].scans == 5
+    assert delta.usage[('public', 'new')].scans == 7
+
+
+def test_report():
+    snapshot = UsageSnapshot([
+        ViewUsage('public', 'hot', False, 5000, 10),
+        ViewUsage('public', 'hot_matview', True, 9000, 10),
+        ViewUsage('public', 'quiet', False, 3, 10),
+        ViewUsage('public', 'dead', False, 0, 0),
+        ViewUsage(None, 'dead_matview', True, 0, 0),
+    ])
+    report = snapshot.report(hot_scans=1000, dead_scans=0)
+    assert [u.name for u in report.hot] == ['hot']
+    assert sorted(u.name for u in report.dead) == ['dead', 'dead_matview']
+    assert len(report.views) == 5
+    as_dict = report.as_dict()
+    assert as_dict['hot'] == ['public.hot']
+    assert sorted(as_dict['dead']) == ['dead_matview', 'public.dead']
+    assert as_dict['views'][0]['name'] == 'hot_matview'
+
+
+def test_unsupported_dialect():
+    engine = sa.create_engine('sqlite://')
+    with engine.connect() as conn:
+        with pytest.raises(NotImplementedError):
+            take_snapshot(conn)
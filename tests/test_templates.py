@@ -0,0 +1,61 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_views import CreateView, DropView
+from sqlalchemy_views.templates import SchemaTemplate
+from conftest import clean, t1
+
+
+def compile_query(query, **kwargs):
+    return str(query.compile(dialect=postgresql.dialect(), **kwargs))
+
+
+def make_view():
+    selectable = sa.sql.select(t1).where(t1.c.col2 > 5)
+    return CreateView(Table('myview', sa.MetaData()), selectable)
+
+
+@pytest.mark.parametrize("tenant", ['tenant_1', 'Tenant Two'])
+def test_matches_schema_translate_map(tenant):
+    create_view = make_view()
+    template = SchemaTemplate(create_view, dialect=postgresql.dialect())
+    expected = compile_query(create_view, schema_translate_map={None: tenant},
+                             render_schema_translate=True)
+    assert clean(template.render({None: tenant})) == clean(expected)
+
+
+@pytest.mark.parametrize("schema_map", [{None: None}, {}, None])
+def test_render_untranslated(schema_map):
+    create_view = make_view()
+    template = SchemaTemplate(create_view, dialect=postgresql.dialect())
+    expected = compile_query(create_view)
+    assert clean(template.render(schema_map)) == clean(expected)
+
+
+def test_render_tenant():
+    template = SchemaTemplate(make_view(), dialect=postgresql.dialect())
+    assert clean(template.render({None: 'tenant_1'})) == (
+        'CREATE VIEW tenant_1.myview AS SELECT tenant_1.t1.col1, '
+        'tenant_1.t1.col2 FROM tenant_1.t1 WHERE tenant_1.t1.col2 > 5')
+
+
+def test_explicit_schemas():
+    view = Table('myview', sa.MetaData(schema='shared'))
+    template = SchemaTemplate(DropView(view), schemas=['shared'])
+    assert template.schemas == frozenset(['shared'])
+    assert clean(template.render({'shared': 'tenant_1'})) == (
+        'DROP VIEW tenant_1.myview')
+    assert clean(template.render()) == 'DROP VIEW shared.myview'
+
+
+def test_lightweight_table_schemas():
+    events = sa.table('events', sa.column('id'), schema='shared')
+    create_view = CreateView(Table('myview', sa.MetaData()),
+                             sa.select(events.c.id))
+    template = SchemaTemplate(create_view, dialect=postgresql.dialect())
+    assert template.schemas == frozenset([None, 'shared'])
+    assert clean(template.render({'shared': 'tenant_1'})) == (
+        'CREATE VIEW myview AS SELECT tenant_1.events.id '
+        'FROM tenant_1.events')
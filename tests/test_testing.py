@@ -0,0 +1,63 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Table
+
+from sqlalchemy_views import CreateView
+
+pytest_plugins = ['sqlalchemy_views.testing']
+
+metadata = sa.MetaData()
+t1 = Table('t1', metadata,
+           sa.Column('col1', sa.Integer(), primary_key=True),
+           sa.Column('col2', sa.Integer()))
+
+
+def test_check_views(view_checker):
+    good = CreateView(Table('good', sa.MetaData()), sa.select(t1),
+                      or_replace=True, materialized=True)
+    on_view = CreateView(Table('on_view', sa.MetaData()),
+                         sa.text('SELECT col1 FROM good'))
+    broken = CreateView(Table('broken', sa.MetaData()),
+                        sa.text('SELECT missing FROM t1'))
+    checks = view_checker.check_views([good, on_view, broken],
+                                      metadata=metadata)
+    assert [(c.name, c.ok) for c in checks] == [
+        ('good', True), ('on_view', True), ('broken', False)]
+    assert checks[0].seconds >= 0
+    assert good.or_replace and good.materialized
+
+
+def test_assert_views(view_checker):
+    broken = CreateView(Table('broken', sa.MetaData()),
+                        sa.text('SELECT missing FROM t1'))
+    with pytest.raises(AssertionError) as excinfo:
+        view_checker.assert_views([broken], metadata=metadata)
+    assert 'broken' in str(excinfo.value)
+
+
+def test_assert_views_time_limit(view_checker):
+    view = CreateView(Table('good', sa.MetaData()), sa.select(t1))
+    with pytest.raises(AssertionError) as excinfo:
+        view_checker.assert_views([view], metadata=metadata, max_seconds=-1)
+    assert 'sample query took' in str(excinfo.value)
+
+
+def test_check_views_with_options(view_checker):
+    view = CreateView(Table('with_options', sa.MetaData()), sa.select(t1),
+                      options={'security_barrier': 'true'})
+    checks = view_checker.check_views([view], metadata=metadata)
+    assert checks[0].ok, checks[0].error
+    assert view.options
+
+
+@pytest.mark.parametrize('option', [
+    {'secure': True},
+    {'late_binding': True},
+    {'cluster_by': ['col1']},
+    {'check_option': 'cascaded'},
+])
+def test_check_views_with_unsupported_clauses(view_checker, option):
+    view = CreateView(Table('unsupported', sa.MetaData()), sa.select(t1),
+                      **option)
+    checks = view_checker.check_views([view], metadata=metadata)
+    assert checks[0].ok, checks[0].error
@@ -1,24 +1,17 @@
-import re
-
 import pytest
 import sqlalchemy as sa
 from sqlalchemy import Table
 from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.default import DefaultDialect
 from packaging.version import Version
 
-from sqlalchemy_views import CreateView, DropView
+from sqlalchemy_views import (
+    CreateView, DropView, DropViews, LargeViewDefinitionWarning,
+    RefreshMaterializedView)
+from conftest import clean, t1
 
 sqla_version = Version(sa.__version__)
 
-t1 = Table('t1', sa.MetaData(),
-           sa.Column('col1', sa.Integer(), primary_key=True),
-           sa.Column('col2', sa.Integer()))
-
-
-def clean(query):
-    return re.sub(r'\s+', ' ', query).strip()
-
-
 def compile_query(query, **kwargs):
     compile_kwargs = {'literal_binds': True}
     compiled = query.compile(compile_kwargs=compile_kwargs, **kwargs)
@@ -189,3 +182,255 @@ def test_drop_with_bind_parameter_is_not_none():
     view = Table('myview', sa.MetaData())
     with pytest.raises(TypeError):
         DropView(view, bind=True)  # bind is not None
+
+
+def test_view_infer_columns():
+    selectable = sa.sql.select(t1.c.col1, (t1.c.col2 * 2).label('double'))
+    view = Table('myview', sa.MetaData())
+    create_view = CreateView(view, selectable, infer_columns=True)
+    assert view.c.keys() == ['col1', 'double']
+    assert isinstance(view.c.double.type, sa.Integer)
+    expected_result = """
+    CREATE VIEW myview (col1, double) AS
+      SELECT t1.col1, t1.col2 * 2 AS double FROM t1
+    """
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+
+def test_view_infer_columns_unlabeled():
+    selectable = sa.sql.select(sa.literal(0))
+    view = Table('myview', sa.MetaData())
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, infer_columns=True)
+
+
+@pytest.mark.parametrize("columns", [
+    [sa.Column('col3', sa.Integer())],
+    [sa.Column('col3', sa.Integer()), sa.Column('col4', sa.String())],
+    ])
+def test_view_infer_columns_mismatch(columns):
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData(), *columns)
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, infer_columns=True)
+
+
+def test_view_infer_columns_fills_untyped():
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData(),
+                 sa.Column('col3'), sa.Column('col4', sa.BigInteger()))
+    CreateView(view, selectable, infer_columns=True)
+    assert isinstance(view.c.col3.type, sa.Integer)
+
+
+def test_view_prune_columns():
+    expected_result = """
+    CREATE VIEW myview (col2) AS SELECT t1.col2 FROM t1
+    """
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData(), sa.Column('col2', sa.Integer()))
+    create_view = CreateView(view, selectable, prune_columns=True,
+                             infer_columns=True)
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+
+def test_view_prune_unknown_column():
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData(), sa.Column('col3', sa.Integer()))
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, prune_columns=True)
+
+
+def test_materialized_view():
+    expected_result = """
+    CREATE MATERIALIZED VIEW myview AS SELECT t1.col1, t1.col2 FROM t1
+    """
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData())
+    create_view = CreateView(view, selectable, materialized=True)
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+
+def test_drop_materialized_view():
+    expected_result = """
+    DROP MATERIALIZED VIEW IF EXISTS myview CASCADE
+    """
+    view = Table('myview', sa.MetaData())
+    drop_view = DropView(view, materialized=True, if_exists=True,
+                         cascade=True)
+    assert clean(expected_result) == clean(compile_query(drop_view))
+
+
+@pytest.mark.parametrize("concurrently,expected_result", [
+    (False, "REFRESH MATERIALIZED VIEW myschema.myview"),
+    (True, "REFRESH MATERIALIZED VIEW CONCURRENTLY myschema.myview"),
+    ])
+def test_refresh_materialized_view(concurrently, expected_result):
+    view = Table('myview', sa.MetaData(schema='myschema'))
+    refresh = RefreshMaterializedView(view, concurrently=concurrently)
+    assert clean(expected_result) == clean(compile_query(refresh))
+
+
+def test_drop_views():
+    expected_result = """
+    DROP VIEW IF EXISTS myview, myschema.other CASCADE
+    """
+    views = [Table('myview', sa.MetaData()),
+             Table('other', sa.MetaData(schema='myschema'))]
+    drop_views = DropViews(views, cascade=True, if_exists=True)
+    assert clean(expected_result) == clean(compile_query(drop_views))
+
+
+def test_drop_views_requires_views():
+    with pytest.raises(ValueError):
+        DropViews([])
+
+
+class StandInDialect(DefaultDialect):
+    """Stands in for warehouse dialects that are not installed."""
+
+    def __init__(self, name, **kwargs):
+        super(StandInDialect, self).__init__(**kwargs)
+        self.name = name
+
+
+@pytest.mark.parametrize("dialect,kwargs,expected_result", [
+    ('redshift', dict(late_binding=True),
+     "CREATE VIEW myview AS SELECT t1.col1, t1.col2 FROM t1 "
+     "WITH NO SCHEMA BINDING"),
+    ('snowflake', dict(secure=True, or_replace=True),
+     "CREATE OR REPLACE SECURE VIEW myview AS "
+     "SELECT t1.col1, t1.col2 FROM t1"),
+    ('snowflake', dict(secure=True, materialized=True,
+                       cluster_by=['col2', t1.c.col1 + 1]),
+     "CREATE SECURE MATERIALIZED VIEW myview CLUSTER BY (col2, col1 + 1) "
+     "AS SELECT t1.col1, t1.col2 FROM t1"),
+    ('bigquery', dict(materialized=True, cluster_by=['col1', 'col2']),
+     "CREATE MATERIALIZED VIEW myview CLUSTER BY col1, col2 "
+     "AS SELECT t1.col1, t1.col2 FROM t1"),
+    ])
+def test_warehouse_view_modes(dialect, kwargs, expected_result):
+    selectable = sa.sql.select(t1)
+    view = Table('myview', sa.MetaData())
+    create_view = CreateView(view, selectable, **kwargs)
+    actual = compile_query(create_view, dialect=StandInDialect(dialect))
+    assert clean(expected_result) == clean(actual)
+
+
+def test_view_flatten():
+    base_view = Table('base_view', sa.MetaData(),
+                      sa.Column('id', sa.Integer()),
+                      sa.Column('value', sa.Integer()))
+    create_base = CreateView(
+        base_view, sa.sql.select(t1).where(t1.c.col2 > 0))
+    mid_view = Table('mid_view', sa.MetaData(),
+                     sa.Column('id', sa.Integer()),
+                     sa.Column('value', sa.Integer()))
+    create_mid = CreateView(
+        mid_view, sa.sql.select(base_view).where(base_view.c.value < 10))
+    selectable = sa.sql.select(mid_view.c.id).where(mid_view.c.value == 5)
+
+    expected_result = """
+    CREATE VIEW top_view AS SELECT mid_view.id FROM
+      (SELECT base_view.id AS id, base_view.value AS value FROM
+        (SELECT t1.col1 AS id, t1.col2 AS value FROM t1
+         WHERE t1.col2 > 0) AS base_view
+       WHERE base_view.value < 10) AS mid_view
+    WHERE mid_view.value = 5
+    """
+    create_view = CreateView(Table('top_view', sa.MetaData()), selectable,
+                             flatten=[create_base, create_mid])
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+    expected_result = """
+    CREATE VIEW top_view AS SELECT mid_view.id FROM
+      (SELECT base_view.id AS id, base_view.value AS value FROM base_view
+       WHERE base_view.value < 10) AS mid_view
+    WHERE mid_view.value = 5
+    """
+    create_view = CreateView(Table('top_view', sa.MetaData()), selectable,
+                             flatten=[create_base, create_mid],
+                             flatten_depth=1)
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+
+def test_create_view_size_guard():
+    view = Table('myview', sa.MetaData())
+    selectable = sa.sql.select(t1.c.col1).where(t1.c.col2.in_(range(100)))
+
+    create_view = CreateView(view, selectable, size_warning_threshold=100)
+    with pytest.warns(LargeViewDefinitionWarning, match='myview') as record:
+        compiled = str(create_view.compile())
+    assert '99' in compiled
+    assert record[0].filename == __file__
+
+    create_view = CreateView(view, selectable, size_warning_threshold=100,
+                             size_limit_action='raise')
+    with pytest.raises(ValueError, match='myview'):
+        compile_query(create_view)
+
+    create_view = CreateView(view, selectable, size_warning_threshold=None)
+    assert '99' in compile_query(create_view)
+
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, size_limit_action='ignore')
+
+
+def test_create_view_check_option():
+    view = Table('myview', sa.MetaData())
+    selectable = sa.sql.select(t1).where(t1.c.col2 > 0)
+
+    expected_result = """
+    CREATE VIEW myview AS SELECT t1.col1, t1.col2 FROM t1
+    WHERE t1.col2 > 0 WITH CHECK OPTION
+    """
+    create_view = CreateView(view, selectable, check_option=True)
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+    expected_result = """
+    CREATE VIEW myview AS SELECT t1.col1, t1.col2 FROM t1
+    WHERE t1.col2 > 0 WITH LOCAL CHECK OPTION
+    """
+    create_view = CreateView(view, selectable, check_option='local')
+    assert clean(expected_result) == clean(compile_query(create_view))
+
+    aliased = t1.alias('t')
+    CreateView(view, sa.sql.select(aliased).where(aliased.c.col2 > 0),
+               check_option='local')
+
+    t2 = t1.alias('t2')
+    counted = (sa.sql.select(sa.func.count()).select_from(t2)
+               .where(t2.c.col1 == t1.c.col1).scalar_subquery())
+    CreateView(view, sa.sql.select(t1.c.col1, counted.label('n'),
+                                   sa.exists().where(t2.c.col2 > 0)),
+               check_option='local')
+
+    create_view = CreateView(view, sa.text('SELECT col1 FROM t1'),
+                             check_option='cascaded')
+    assert compile_query(create_view).strip().endswith(
+        'WITH CASCADED CHECK OPTION')
+
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, check_option='always')
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, check_option=1)
+    with pytest.raises(ValueError):
+        CreateView(view, selectable, check_option=True, materialized=True)
+
+
+@pytest.mark.parametrize('selectable', [
+    sa.sql.select(t1).distinct(),
+    sa.sql.select(t1.c.col2).group_by(t1.c.col2),
+    sa.sql.select(sa.func.count(t1.c.col1)),
+    sa.sql.select((sa.func.max(t1.c.col1) + 1).label('m')),
+    sa.sql.select(sa.func.row_number().over(order_by=t1.c.col1)),
+    sa.sql.select(t1).limit(10),
+    sa.sql.select(t1).offset(10),
+    sa.sql.select(t1).union(sa.sql.select(t1)),
+    sa.sql.select(t1, t1.alias('t2')),
+    sa.sql.select(t1.join(t1.alias('t2'), sa.true())),
+])
+def test_create_view_check_option_not_updatable(selectable):
+    with pytest.raises(ValueError, match='check option'):
+        CreateView(Table('myview', sa.MetaData()), selectable,
+                   check_option='local')